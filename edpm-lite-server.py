@@ -47,11 +47,20 @@ CONFIG = {
     "debug": os.getenv("EDPM_DEBUG", "false").lower() == "true"
 }
 
+# Log and event rows are buffered and written in one transaction every
+# DB_FLUSH_INTERVAL seconds, or as soon as DB_FLUSH_SIZE rows are pending
+DB_FLUSH_SIZE = 500
+DB_FLUSH_INTERVAL = 0.05
+
+# OR IGNORE: a duplicate id must not abort the rest of its batch
+INSERT_LOG_SQL = 'INSERT OR IGNORE INTO logs VALUES (?, ?, ?, ?, ?, ?)'
+INSERT_EVENT_SQL = 'INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?)'
+
 @dataclass
 class Message:
     """Universal message format"""
     v: int = 1
-    t: str = "log"  # log, cmd, evt, res
+    t: str = "log"  # log, cmd, evt, res, batch
     id: str = ""
     src: str = ""
     ts: float = 0
@@ -133,6 +142,10 @@ class EDPMLiteServer:
             'start_time': time.time()
         }
         
+        # Rows waiting for the next batched write
+        self._pending_logs = []
+        self._pending_events = []
+        
         # Initialize components
         self._init_database()
         self._init_gpio()
@@ -208,6 +221,7 @@ class EDPMLiteServer:
             tasks.append(self.start_web_server())
         
         tasks.append(self.stats_reporter())
+        tasks.append(self.db_writer())
         
         if not tasks:
             logger.error("No transport available! Install pyzmq or aiohttp")
@@ -297,25 +311,36 @@ class EDPMLiteServer:
             return await self.handle_command(msg)
         elif msg.t == "evt":
             return await self.handle_event(msg)
+        elif msg.t == "batch":
+            return await self.handle_batch(msg)
         else:
             return Message(t="res", d={"status": "error", "message": "Unknown message type"})
     
+    async def handle_batch(self, msg: Message) -> Message:
+        """Handle several messages sent in one request (e.g. log + event)"""
+        count = 0
+        for sub in msg.d.get('msgs', []):
+            sub_msg = Message(**sub)
+            if sub_msg.t == "batch":
+                continue
+            await self.process_message(sub_msg)
+            count += 1
+        
+        return Message(t="res", d={"status": "ok", "count": count})
+    
     async def handle_log(self, msg: Message) -> Message:
         """Handle log messages"""
-        # Save to database
-        cursor = self.db.cursor()
-        cursor.execute(
-            'INSERT INTO logs VALUES (?, ?, ?, ?, ?, ?)',
-            (
-                msg.id,
-                msg.ts,
-                msg.src,
-                msg.d.get('level', 'info'),
-                msg.d.get('msg', ''),
-                json.dumps(msg.d.get('metadata', {}))
-            )
-        )
-        self.db.commit()
+        # Queue for the next database write
+        self._pending_logs.append((
+            msg.id,
+            msg.ts,
+            msg.src,
+            msg.d.get('level', 'info'),
+            msg.d.get('msg', ''),
+            json.dumps(msg.d.get('metadata', {}))
+        ))
+        if len(self._pending_logs) >= DB_FLUSH_SIZE:
+            self.flush_db()
         
         # Broadcast to WebSocket clients
         await self.broadcast_to_clients(msg)
@@ -422,13 +447,10 @@ class EDPMLiteServer:
         """Handle event messages"""
         event_name = msg.d.get('event')
         
-        # Save to database
-        cursor = self.db.cursor()
-        cursor.execute(
-            'INSERT INTO events VALUES (?, ?, ?, ?, ?)',
-            (msg.id, msg.ts, msg.src, event_name, json.dumps(msg.d))
-        )
-        self.db.commit()
+        # Queue for the next database write
+        self._pending_events.append((msg.id, msg.ts, msg.src, event_name, json.dumps(msg.d)))
+        if len(self._pending_events) >= DB_FLUSH_SIZE:
+            self.flush_db()
         
         # Trigger event handlers
         if event_name in self.event_handlers:
@@ -632,6 +654,36 @@ class EDPMLiteServer:
                 f"Clients={len(self.clients)}"
             )
     
+    def flush_db(self):
+        """Write pending logs and events in a single transaction"""
+        logs, self._pending_logs = self._pending_logs, []
+        events, self._pending_events = self._pending_events, []
+        if not logs and not events:
+            return
+        try:
+            before = self.db.total_changes
+            with self.db:
+                if logs:
+                    self.db.executemany(INSERT_LOG_SQL, logs)
+                if events:
+                    self.db.executemany(INSERT_EVENT_SQL, events)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to store {len(logs)} logs and {len(events)} events: {e}")
+            self.stats['errors'] += 1
+            return
+        
+        # Rows whose id was already taken are skipped by OR IGNORE after the client got ok
+        dropped = len(logs) + len(events) - (self.db.total_changes - before)
+        if dropped:
+            logger.warning(f"Dropped {dropped} of {len(logs)} logs and {len(events)} events with duplicate ids")
+            self.stats['errors'] += dropped
+    
+    async def db_writer(self):
+        """Periodically write buffered rows to the database"""
+        while self.running:
+            await asyncio.sleep(DB_FLUSH_INTERVAL)
+            self.flush_db()
+    
     async def shutdown(self):
         """Graceful shutdown"""
         logger.info("Shutting down EDPM Lite Server...")
@@ -646,6 +698,7 @@ class EDPMLiteServer:
             self.gpio.cleanup()
         
         # Close database
+        self.flush_db()
         self.db.close()
         
         logger.info("Shutdown complete")
@@ -73,8 +73,10 @@ class EDPMLite:
     
     def _init_zmq(self):
         """Initialize ZeroMQ connection"""
-        self.context = zmq.Context()
+        # Process-wide context: one I/O thread however many clients are created
+        self.context = zmq.Context.instance()
         self.socket = self.context.socket(zmq.REQ)
+        self.socket.setsockopt(zmq.LINGER, 0)
         self.socket.connect(self.endpoint)
     
     def _init_ws(self):
@@ -161,6 +163,16 @@ class EDPMLite:
             data = {}
         return self.event(event_name, **data)
     
+    def log_and_emit(self, level: str, message: str, event_name: str, **data):
+        """Log and emit event in a single round trip (batch message)"""
+        log_msg = Message(t="log", d={"level": level, "msg": message, **data})
+        evt_msg = Message(t="evt", d={"event": event_name, **data})
+        msg = Message(
+            t="batch",
+            d={"msgs": [asdict(log_msg), asdict(evt_msg)]}
+        )
+        return self.send(msg)
+    
     def on(self, event_name: str, callback: Callable):
         """Register event handler"""
         self.callbacks[event_name] = callback
@@ -183,6 +195,15 @@ class EDPMLite:
                        pin=pin, 
                        frequency=frequency,
                        duty_cycle=duty_cycle)
+    
+    def close(self):
+        """Close the socket; the shared ZMQ context stays up for other clients"""
+        if self.socket:
+            self.socket.close(linger=0)
+            self.socket = None
+        if self.ws:
+            self.ws.close()
+            self.ws = None
 
 # Singleton instance
 _client = None
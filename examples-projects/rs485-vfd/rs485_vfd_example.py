@@ -9,17 +9,31 @@ import json
 import time
 import logging
 import math
+from collections import defaultdict, deque
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 
+import numpy as np
+
 from edpm import EDPMClient, Config, Message
 
+# Optional direct RTU backend (bypasses the EDPM server for register reads)
+try:
+    from pymodbus.client import AsyncModbusSerialClient
+    HAS_PYMODBUS = True
+except ImportError:
+    HAS_PYMODBUS = False
+    AsyncModbusSerialClient = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Command registers that are written but never meaningfully read back
+WRITE_ONLY_REGISTERS = {"control_word", "command_word"}
+
 
 class VFDStatus(Enum):
     """VFD operational status"""
@@ -31,9 +45,9 @@ class VFDStatus(Enum):
     MAINTENANCE = "maintenance"
 
 
-@dataclass
+@dataclass(slots=True)
 class VFDParameters:
-    """VFD parameter data structure"""
+    """VFD parameter data structure (slotted: one instance per device per poll)"""
     device_id: int
     name: str
     status: VFDStatus
@@ -49,17 +63,13 @@ class VFDParameters:
     timestamp: float
 
 
-@dataclass
+@dataclass(slots=True)
 class PowerMeterData:
-    """Power meter measurement data"""
+    """Power meter measurement data (slotted: one instance per meter per poll)"""
     device_id: int
     name: str
-    voltage_l1: float      # V
-    voltage_l2: float      # V
-    voltage_l3: float      # V
-    current_l1: float      # A
-    current_l2: float      # A
-    current_l3: float      # A
+    voltage: float         # V (single phase, as reported by read_power_meter)
+    current: float         # A
     active_power: float    # kW
     reactive_power: float  # kVAR
     apparent_power: float  # kVA
@@ -80,9 +90,37 @@ class RS485VFDController:
         self.device_configs = self.load_device_configs()
         self.client = None
         self.running = False
-        self.vfd_data = {}
-        self.power_data = {}
+        # Latest reading per device; history is bounded by the retention window
+        self.vfd_data: Dict[int, VFDParameters] = {}
+        self.power_data: Dict[int, PowerMeterData] = {}
+        monitoring = self.config["monitoring"]
+        self._history_max = max(1, int(monitoring["data_retention_hours"] * 3600 / monitoring["update_interval"]))
+        self.vfd_history: Dict[int, deque] = defaultdict(lambda: deque(maxlen=self._history_max))
+        self.power_history: Dict[int, deque] = defaultdict(lambda: deque(maxlen=self._history_max))
+        self._last_vfd: Optional[VFDParameters] = None
+        self._last_power: Optional[PowerMeterData] = None
         self.discovered_devices = []
+        self._rtu_client = None
+        self._bus_lock = asyncio.Lock()
+        # Per-read deadline; unresponsive slaves are skipped with exponential backoff
+        self._modbus_timeout = self.config["modbus_scan"]["timeout"] * 2
+        self._stale_until: Dict[int, float] = {}
+        self._stale_backoff: Dict[int, float] = {}
+        # Last alarm state per (device, check); a state that persists across polls is logged once
+        self._alarm_state: Dict[Tuple[int, str], Any] = {}
+        self._init_current_alarm_state()
+    
+    def _init_current_alarm_state(self):
+        """Preallocate per-VFD arrays so motor current alarms are checked in one vectorized pass"""
+        vfd_devices = self.device_configs["vfd_devices"]
+        self._vfd_index = {int(device_id): idx for idx, device_id in enumerate(vfd_devices)}
+        self._vfd_ids = np.array(list(self._vfd_index), dtype=np.int32)
+        self._vfd_rated_current = np.array(
+            [cfg.get("rated_current", 12.0) for cfg in vfd_devices.values()], dtype=np.float32
+        )
+        self._vfd_current = np.zeros(len(self._vfd_index), dtype=np.float32)
+        self._vfd_current_alarm = np.zeros(len(self._vfd_index), dtype=bool)
+        self._vfd_current_warning = np.zeros(len(self._vfd_index), dtype=bool)
     
     def load_config(self) -> dict:
         """Load main configuration from file"""
@@ -148,7 +186,7 @@ class RS485VFDController:
                         "rated_voltage": 380,
                         "registers": {
                             "speed_reference": {"address": 1, "type": "holding", "scale": 0.01},
-                            "control_word": {"address": 0, "type": "holding"},
+                            "control_word": {"address": 0, "type": "holding", "writeonly": True},
                             "status_word": {"address": 100, "type": "input"},
                             "actual_speed": {"address": 101, "type": "input", "scale": 0.1},
                             "output_frequency": {"address": 102, "type": "input", "scale": 0.01},
@@ -165,7 +203,7 @@ class RS485VFDController:
                         "rated_voltage": 380,
                         "registers": {
                             "speed_reference": {"address": 1, "type": "holding", "scale": 0.01},
-                            "control_word": {"address": 0, "type": "holding"},
+                            "control_word": {"address": 0, "type": "holding", "writeonly": True},
                             "status_word": {"address": 100, "type": "input"},
                             "actual_speed": {"address": 101, "type": "input", "scale": 0.1}
                         }
@@ -201,27 +239,106 @@ class RS485VFDController:
             await self.client.connect()
             
             logger.info(f"Connected to EDPM server via {self.config['transport']}")
+            
+            if self.config.get("direct_rtu", False):
+                await self.connect_direct_rtu()
             return True
             
         except Exception as e:
             logger.error(f"Failed to connect to EDPM server: {e}")
             return False
     
+    async def connect_direct_rtu(self) -> bool:
+        """Open a local pymodbus RTU client so register reads skip the server round trip"""
+        if not HAS_PYMODBUS:
+            logger.warning("direct_rtu requested but pymodbus is not installed, using EDPM server")
+            return False
+        
+        try:
+            rs485 = self.config["rs485_settings"]
+            client = AsyncModbusSerialClient(
+                port=rs485["port"],
+                baudrate=rs485["baudrate"],
+                parity=rs485["parity"],
+                stopbits=rs485["stopbits"],
+                bytesize=rs485["bytesize"],
+                timeout=rs485["timeout"]
+            )
+            if not await client.connect():
+                logger.warning(f"Direct RTU connection to {rs485['port']} failed, using EDPM server")
+                return False
+            
+            self._rtu_client = client
+            logger.info(f"Direct RTU backend enabled on {rs485['port']}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to open direct RTU backend: {e}")
+            return False
+    
     async def disconnect(self):
         """Disconnect from EDPM server"""
+        if self._rtu_client:
+            self._rtu_client.close()
+            self._rtu_client = None
         if self.client:
             await self.client.disconnect()
             logger.info("Disconnected from EDPM server")
     
+    async def _modbus_read(self, device_id: int, function_code: int,
+                           start_address: int, count: int = 1) -> Optional[List[int]]:
+        """Read registers via the direct RTU backend if enabled, else via the EDPM server"""
+        if self._rtu_client:
+            # RS485 is half-duplex: one transaction on the bus at a time
+            async with self._bus_lock:
+                if function_code == 3:
+                    response = await self._rtu_client.read_holding_registers(
+                        start_address, count=count, slave=device_id)
+                else:
+                    response = await self._rtu_client.read_input_registers(
+                        start_address, count=count, slave=device_id)
+            if response.isError():
+                return None
+            return response.registers
+        
+        result = await self.client.send_command("rs485", {
+            "action": "modbus_read",
+            "device_id": device_id,
+            "function_code": function_code,
+            "start_address": start_address,
+            "count": count
+        })
+        if result and "data" in result and result["data"]:
+            return result["data"]
+        return None
+    
+    def _mark_stale(self, device_id: int):
+        """Skip an unresponsive device for a growing backoff period"""
+        interval = self.config["monitoring"]["update_interval"]
+        backoff = min(self._stale_backoff.get(device_id, interval / 2) * 2, 60.0)
+        self._stale_backoff[device_id] = backoff
+        self._stale_until[device_id] = asyncio.get_running_loop().time() + backoff
+        logger.warning(f"Device {device_id} timed out, skipping for {backoff:.1f}s")
+    
+    def _is_stale(self, device_id: int) -> bool:
+        """Check if a device is still in its timeout backoff period"""
+        until = self._stale_until.get(device_id)
+        return until is not None and asyncio.get_running_loop().time() < until
+    
+    def _mark_alive(self, device_id: int):
+        """Reset timeout backoff after a successful read"""
+        if self._stale_backoff.pop(device_id, None) is not None:
+            self._stale_until.pop(device_id, None)
+    
     async def log_message(self, level: str, message: str):
         """Send log message to EDPM server"""
         try:
             if self.client:
                 log_msg = Message.log(level, message)
                 await self.client.send_message(log_msg)
-            logger.info(f"{level.upper()}: {message}")
+            logger.info("%s: %s", level.upper(), message)
         except Exception as e:
-            logger.error(f"Failed to send log message: {e}")
+            logger.error("Failed to send log message: %s", e)
     
     async def scan_modbus_devices(self) -> List[int]:
         """Scan for Modbus devices on the RS485 network"""
@@ -262,38 +379,36 @@ class RS485VFDController:
             
             parameters = {}
             
-            # Read all configured registers
+            # Read all configured registers, skipping write-only command registers
             for param_name, reg_config in device_config["registers"].items():
+                if reg_config.get("writeonly", param_name in WRITE_ONLY_REGISTERS):
+                    continue
                 try:
-                    if reg_config["type"] == "holding":
-                        result = await self.client.send_command("rs485", {
-                            "action": "modbus_read",
-                            "device_id": device_id,
-                            "function_code": 3,  # Read Holding Registers
-                            "start_address": reg_config["address"],
-                            "count": 1
-                        })
-                    else:  # input registers
-                        result = await self.client.send_command("rs485", {
-                            "action": "modbus_read",
-                            "device_id": device_id,
-                            "function_code": 4,  # Read Input Registers
-                            "start_address": reg_config["address"],
-                            "count": 1
-                        })
+                    # 3 = Read Holding Registers, 4 = Read Input Registers
+                    function_code = 3 if reg_config["type"] == "holding" else 4
+                    data = await asyncio.wait_for(
+                        self._modbus_read(device_id, function_code, reg_config["address"]),
+                        self._modbus_timeout
+                    )
                     
-                    if result and "data" in result and result["data"]:
-                        raw_value = result["data"][0]
+                    if data:
+                        raw_value = data[0]
                         # Apply scaling if configured
                         scale = reg_config.get("scale", 1.0)
                         parameters[param_name] = raw_value * scale
                     else:
                         parameters[param_name] = 0
-                        
+                
+                except asyncio.TimeoutError:
+                    # Don't let one hung slave stall the poll cycle for every other device
+                    self._mark_stale(device_id)
+                    return None
                 except Exception as e:
                     logger.error(f"Error reading {param_name} from VFD {device_id}: {e}")
                     parameters[param_name] = 0
             
+            self._mark_alive(device_id)
+            
             # Determine VFD status based on status word
             status_word = parameters.get("status_word", 0)
             if status_word & 0x0001:  # Running bit
@@ -316,8 +431,8 @@ class RS485VFDController:
                 output_voltage=parameters.get("output_voltage", 0),
                 output_current=parameters.get("output_current", 0),
                 motor_power=parameters.get("motor_power", 0),
-                torque=parameters.get("torque", 0),
-                temperature=parameters.get("temperature", 0),
+                torque=parameters.get("motor_torque", 0),
+                temperature=parameters.get("drive_temperature", 0),
                 fault_code=parameters.get("fault_code", 0),
                 timestamp=time.time()
             )
@@ -407,12 +522,8 @@ class RS485VFDController:
                 power_data = PowerMeterData(
                     device_id=device_id,
                     name=device_config["name"],
-                    voltage_l1=result.get("voltage", 0),
-                    voltage_l2=result.get("voltage", 0),  # Simplified - would read L2, L3 separately
-                    voltage_l3=result.get("voltage", 0),
-                    current_l1=result.get("current", 0),
-                    current_l2=result.get("current", 0),
-                    current_l3=result.get("current", 0),
+                    voltage=result.get("voltage", 0),
+                    current=result.get("current", 0),
                     active_power=result.get("power", 0),
                     reactive_power=result.get("power", 0) * 0.3,  # Simplified calculation
                     apparent_power=result.get("power", 0) * 1.1,
@@ -439,10 +550,15 @@ class RS485VFDController:
                 # Monitor all VFD devices
                 for device_id_str in self.device_configs["vfd_devices"].keys():
                     device_id = int(device_id_str)
+                    if self._is_stale(device_id):
+                        continue
                     vfd_data = await self.read_vfd_parameters(device_id)
                     
                     if vfd_data:
                         self.vfd_data[device_id] = vfd_data
+                        self.vfd_history[device_id].append(vfd_data)
+                        self._last_vfd = vfd_data
+                        self._vfd_current[self._vfd_index[device_id]] = vfd_data.output_current
                         
                         # Check for alarms
                         await self.check_vfd_alarms(vfd_data)
@@ -450,6 +566,8 @@ class RS485VFDController:
                         # Send data to dashboard
                         await self.send_vfd_data_to_dashboard(vfd_data)
                 
+                await self.check_current_alarms()
+                
                 # Monitor power meters
                 for device_id_str in self.device_configs["power_meters"].keys():
                     device_id = int(device_id_str)
@@ -457,6 +575,8 @@ class RS485VFDController:
                     
                     if power_data:
                         self.power_data[device_id] = power_data
+                        self.power_history[device_id].append(power_data)
+                        self._last_power = power_data
                         
                         # Check for power alarms
                         await self.check_power_alarms(power_data)
@@ -471,39 +591,67 @@ class RS485VFDController:
                 logger.error(f"Error in system monitoring: {e}")
                 await asyncio.sleep(5)  # Wait before retrying
     
+    def _alarm_changed(self, device_id: int, check: str, state) -> bool:
+        """Record the current state of an alarm check; True if it differs from the last poll"""
+        key = (device_id, check)
+        if self._alarm_state.get(key) == state:
+            return False
+        self._alarm_state[key] = state
+        return True
+    
     async def check_vfd_alarms(self, vfd_data: VFDParameters):
-        """Check VFD parameters for alarm conditions"""
+        """Check VFD parameters for alarm conditions, logging only on transitions"""
         try:
             thresholds = self.config["monitoring"]["alarm_thresholds"]
-            
-            # Check motor current
-            if "motor_current" in thresholds:
-                current_threshold = thresholds["motor_current"]
-                current_pct = (vfd_data.output_current / 12.0) * 100  # Assuming 12A rated
-                
-                if current_pct > current_threshold["alarm"]:
-                    await self.log_message("alarm", f"VFD {vfd_data.device_id} motor current alarm: {current_pct:.1f}%")
-                elif current_pct > current_threshold["warning"]:
-                    await self.log_message("warning", f"VFD {vfd_data.device_id} motor current warning: {current_pct:.1f}%")
+            device_id = vfd_data.device_id
             
             # Check motor temperature
             if "motor_temperature" in thresholds and vfd_data.temperature > 0:
                 temp_threshold = thresholds["motor_temperature"]
                 
                 if vfd_data.temperature > temp_threshold["alarm"]:
-                    await self.log_message("alarm", f"VFD {vfd_data.device_id} temperature alarm: {vfd_data.temperature}°C")
+                    level = "alarm"
                 elif vfd_data.temperature > temp_threshold["warning"]:
-                    await self.log_message("warning", f"VFD {vfd_data.device_id} temperature warning: {vfd_data.temperature}°C")
+                    level = "warning"
+                else:
+                    level = None
+                if self._alarm_changed(device_id, "temperature", level) and level:
+                    await self.log_message(level, f"VFD {device_id} temperature {level}: {vfd_data.temperature}°C")
             
             # Check for fault codes
-            if vfd_data.fault_code > 0:
-                await self.log_message("alarm", f"VFD {vfd_data.device_id} fault code: {vfd_data.fault_code}")
+            if self._alarm_changed(device_id, "fault", vfd_data.fault_code) and vfd_data.fault_code > 0:
+                await self.log_message("alarm", f"VFD {device_id} fault code: {vfd_data.fault_code}")
             
         except Exception as e:
             logger.error(f"Error checking VFD alarms: {e}")
     
+    async def check_current_alarms(self):
+        """Check motor current of all VFDs at once, logging only on alarm/warning transitions"""
+        try:
+            thresholds = self.config["monitoring"]["alarm_thresholds"]
+            if "motor_current" not in thresholds:
+                return
+            
+            current_threshold = thresholds["motor_current"]
+            current_pct = self._vfd_current / self._vfd_rated_current * 100
+            alarm = current_pct > current_threshold["alarm"]
+            warning = (current_pct > current_threshold["warning"]) & ~alarm
+            
+            new_alarms = np.flatnonzero(alarm & ~self._vfd_current_alarm)
+            new_warnings = np.flatnonzero(warning & ~self._vfd_current_warning)
+            self._vfd_current_alarm = alarm
+            self._vfd_current_warning = warning
+            
+            for idx in new_alarms:
+                await self.log_message("alarm", f"VFD {self._vfd_ids[idx]} motor current alarm: {current_pct[idx]:.1f}%")
+            for idx in new_warnings:
+                await self.log_message("warning", f"VFD {self._vfd_ids[idx]} motor current warning: {current_pct[idx]:.1f}%")
+            
+        except Exception as e:
+            logger.error(f"Error checking motor current alarms: {e}")
+    
     async def check_power_alarms(self, power_data: PowerMeterData):
-        """Check power parameters for alarm conditions"""
+        """Check power parameters for alarm conditions, logging only on transitions"""
         try:
             thresholds = self.config["monitoring"]["alarm_thresholds"]
             
@@ -512,9 +660,13 @@ class RS485VFDController:
                 pf_threshold = thresholds["power_factor"]
                 
                 if power_data.power_factor < pf_threshold["alarm"]:
-                    await self.log_message("alarm", f"Power meter {power_data.device_id} low power factor: {power_data.power_factor}")
+                    level = "alarm"
                 elif power_data.power_factor < pf_threshold["warning"]:
-                    await self.log_message("warning", f"Power meter {power_data.device_id} low power factor: {power_data.power_factor}")
+                    level = "warning"
+                else:
+                    level = None
+                if self._alarm_changed(power_data.device_id, "power_factor", level) and level:
+                    await self.log_message(level, f"Power meter {power_data.device_id} low power factor: {power_data.power_factor}")
             
         except Exception as e:
             logger.error(f"Error checking power alarms: {e}")
@@ -606,8 +758,8 @@ class RS485VFDController:
                 "vfd_devices": len(self.vfd_data),
                 "power_meters": len(self.power_data),
                 "rs485_status": rs485_status,
-                "last_vfd_reading": list(self.vfd_data.values())[-1].__dict__ if self.vfd_data else None,
-                "last_power_reading": list(self.power_data.values())[-1].__dict__ if self.power_data else None
+                "last_vfd_reading": asdict(self._last_vfd) if self._last_vfd else None,
+                "last_power_reading": asdict(self._last_power) if self._last_power else None
             }
             
         except Exception as e:
@@ -10,6 +10,14 @@ import sys
 import os
 from typing import Dict, Any
 
+# Optional faster event loop (libuv-based drop-in for asyncio)
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+    uvloop = None
+
 # Add protocols directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'protocols'))
 
@@ -28,6 +36,13 @@ logger = logging.getLogger('ProtocolSimulator')
 class ProtocolSimulator:
     """Main protocol simulator coordinator"""
     
+    # RS485 log format per slave_id: (data key, log format)
+    RS485_LOG_FORMATS = {
+        1: ('temperature', "RS485: Device %d - Temperature: %.1f°C"),  # Temperature controller
+        2: ('power', "RS485: Device %d - Power: %.2fkW"),  # Power meter
+        3: ('frequency_actual', "RS485: Device %d - Frequency: %.1fHz"),  # VFD
+    }
+    
     def __init__(self):
         self.running = False
         self.edpm_client = None
@@ -37,13 +52,22 @@ class ProtocolSimulator:
         self.i2s_handler = None
         self.rs485_handler = None
         
-        # Monitoring tasks
-        self.tasks = []
+        # Monitoring tasks (fixed once monitoring starts)
+        self.tasks = ()
+        
+        # Set to wake start() for shutdown (created on the running loop in initialize)
+        self._stop_event = None
     
     async def initialize(self):
         """Initialize all protocol handlers and EDPM connection"""
         logger.info("🚀 Initializing EDPM Protocol Simulator...")
         
+        self._stop_event = asyncio.Event()
+        
+        # Run new tasks eagerly up to their first real suspension point (Python 3.12+)
+        if hasattr(asyncio, "eager_task_factory"):
+            asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+        
         # Initialize EDPM client
         try:
             self.edpm_client = edpm_lite.EDPMLite(use_zmq=True)
@@ -81,26 +105,30 @@ class ProtocolSimulator:
         
         logger.info("📊 Starting protocol monitoring...")
         
+        tasks = []
+        
         # Start I2C monitoring
         if self.i2c_handler:
             task = asyncio.create_task(
                 self.i2c_handler.continuous_monitoring(self._i2c_callback, interval=2.0)
             )
-            self.tasks.append(task)
+            tasks.append(task)
         
         # Start I2S monitoring
         if self.i2s_handler:
             task = asyncio.create_task(
                 self.i2s_handler.continuous_monitoring(self._i2s_callback, interval=1.0)
             )
-            self.tasks.append(task)
+            tasks.append(task)
         
         # Start RS485 monitoring
         if self.rs485_handler:
             task = asyncio.create_task(
                 self.rs485_handler.continuous_monitoring(self._rs485_callback, interval=3.0)
             )
-            self.tasks.append(task)
+            tasks.append(task)
+        
+        self.tasks = tuple(tasks)
         
         logger.info("✅ All monitoring tasks started")
     
@@ -108,68 +136,52 @@ class ProtocolSimulator:
         """Handle I2C sensor data"""
         try:
             if self.edpm_client:
-                # Log sensor readings
+                timestamp = asyncio.get_running_loop().time()
                 if 'temperature' in data:
-                    self.edpm_client.log("info", "I2C sensor reading", **data)
-                
-                # Emit sensor events
-                self.edpm_client.emit_event("sensor_reading", {
-                    "protocol": "I2C",
-                    "timestamp": asyncio.get_event_loop().time(),
-                    **data
-                })
+                    # Log sensor readings and emit sensor event in one round trip
+                    self.edpm_client.log_and_emit("info", "I2C sensor reading", "sensor_reading",
+                                                  protocol="I2C", timestamp=timestamp, **data)
+                else:
+                    # Emit sensor events
+                    self.edpm_client.event("sensor_reading", protocol="I2C",
+                                           timestamp=timestamp, **data)
             
-            logger.info(f"I2C: {data}")
+            logger.info("I2C: %s", data)
             
         except Exception as e:
-            logger.error(f"I2C callback error: {e}")
+            logger.error("I2C callback error: %s", e)
     
     async def _i2s_callback(self, data: Dict[str, Any]):
         """Handle I2S audio data"""
         try:
             if self.edpm_client:
-                # Log audio analysis
-                self.edpm_client.log("info", "Audio analysis", **data)
-                
-                # Emit audio events
-                self.edpm_client.emit_event("audio_level", {
-                    "protocol": "I2S",
-                    "timestamp": asyncio.get_event_loop().time(),
-                    **data
-                })
+                # Log audio analysis and emit audio event in one round trip
+                self.edpm_client.log_and_emit("info", "Audio analysis", "audio_level", protocol="I2S",
+                                              timestamp=asyncio.get_running_loop().time(), **data)
             
-            logger.info(f"I2S: Level={data.get('db_level', -120):.1f}dB, Freq={data.get('dominant_frequency', 0):.1f}Hz")
+            logger.info("I2S: Level=%.1fdB, Freq=%.1fHz",
+                        data.get('db_level', -120), data.get('dominant_frequency', 0))
             
         except Exception as e:
-            logger.error(f"I2S callback error: {e}")
+            logger.error("I2S callback error: %s", e)
     
     async def _rs485_callback(self, data: Dict[str, Any]):
         """Handle RS485/Modbus device data"""
         try:
             if self.edpm_client:
-                # Log device readings
-                self.edpm_client.log("info", f"Modbus device {data.get('slave_id', 'unknown')}", **data)
-                
-                # Emit device events
-                self.edpm_client.emit_event("modbus_reading", {
-                    "protocol": "RS485",
-                    "timestamp": asyncio.get_event_loop().time(),
-                    **data
-                })
+                # Log device readings and emit device event in one round trip
+                self.edpm_client.log_and_emit("info", f"Modbus device {data.get('slave_id', 'unknown')}",
+                                              "modbus_reading", protocol="RS485",
+                                              timestamp=asyncio.get_running_loop().time(), **data)
             
             slave_id = data.get('slave_id', 0)
-            if slave_id == 1:  # Temperature controller
-                temp = data.get('temperature', 0)
-                logger.info(f"RS485: Device {slave_id} - Temperature: {temp:.1f}°C")
-            elif slave_id == 2:  # Power meter
-                power = data.get('power', 0)
-                logger.info(f"RS485: Device {slave_id} - Power: {power:.2f}kW")
-            elif slave_id == 3:  # VFD
-                freq = data.get('frequency_actual', 0)
-                logger.info(f"RS485: Device {slave_id} - Frequency: {freq:.1f}Hz")
+            log_format = self.RS485_LOG_FORMATS.get(slave_id)
+            if log_format:
+                key, fmt = log_format
+                logger.info(fmt, slave_id, data.get(key, 0))
             
         except Exception as e:
-            logger.error(f"RS485 callback error: {e}")
+            logger.error("RS485 callback error: %s", e)
     
     async def run_demo_sequence(self):
         """Run a demonstration sequence of all protocols"""
@@ -181,7 +193,8 @@ class ProtocolSimulator:
             
             # Scan for devices
             devices = self.i2c_handler.scan()
-            logger.info(f"I2C devices found: {[f'0x{addr:02X}' for addr in devices]}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("I2C devices found: %s", [f'0x{addr:02X}' for addr in devices])
             
             # Read BME280 if available
             if 0x76 in devices:
@@ -256,19 +269,24 @@ class ProtocolSimulator:
         # Start continuous monitoring
         await self.start_monitoring()
         
-        # Keep running
+        # Keep running until stop is requested
         logger.info("🔄 Protocol simulator running... Press Ctrl+C to stop")
         try:
-            while self.running:
-                await asyncio.sleep(1)
+            await self._stop_event.wait()
         except KeyboardInterrupt:
             logger.info("🛑 Shutdown requested")
         finally:
             await self.stop()
     
+    def request_stop(self):
+        """Wake the main loop so the simulator shuts down"""
+        self.running = False
+        if self._stop_event:
+            self._stop_event.set()
+    
     async def stop(self):
         """Stop the protocol simulator"""
-        self.running = False
+        self.request_stop()
         
         logger.info("🛑 Stopping protocol simulator...")
         
@@ -283,19 +301,21 @@ class ProtocolSimulator:
         
         logger.info("✅ Protocol simulator stopped")
 
-def signal_handler(signum, frame):
-    """Handle shutdown signals"""
-    logger.info(f"Received signal {signum}")
-    # The asyncio event loop will handle the KeyboardInterrupt
-
 async def main():
     """Main entry point"""
-    # Set up signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Create and start simulator
     simulator = ProtocolSimulator()
+    loop = asyncio.get_running_loop()
+    
+    def signal_handler(signum):
+        """Handle shutdown signals"""
+        logger.info("Received signal %s", signum)
+        simulator.request_stop()
+    
+    # Set up signal handlers (run as loop callbacks, wake the loop immediately)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, signal_handler, sig)
+    
+    # Start simulator
     await simulator.start()
 
 if __name__ == "__main__":
@@ -305,6 +325,10 @@ if __name__ == "__main__":
     
     logger.info("🚀 Starting EDPM Extended Protocol Simulator")
     
+    if HAS_UVLOOP:
+        uvloop.install()
+        logger.info("Using uvloop event loop")
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -5,13 +5,16 @@ Supports: BME280, BMP280, ADS1115, PCF8574, DS3231, etc.
 import asyncio
 import struct
 import time
-import random
+import numpy as np
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import logging
 
 logger = logging.getLogger('I2C')
 
+# BME280 data block 0xF7..0xFE: pressure MSB/LSB, (XLSB), temperature MSB/LSB, (XLSB), humidity MSB/LSB
+_BME280_STRUCT = struct.Struct('>HxHxH')
+
 @dataclass
 class I2CDevice:
     """I2C Device representation"""
@@ -35,17 +38,35 @@ class I2CHandler:
         0x27: "LCD1602", # LCD Display
     }
     
-    def __init__(self, bus_number: int = 1, simulator: bool = False):
+    # Addresses probed by a default scan (known devices only)
+    _PROBE_ADDRS = frozenset(DEVICES)
+    
+    # ADS1115 config bytes (MSB, LSB) per channel: single-shot, channel select, gain=1
+    _ADS1115_CONFIG = tuple(
+        ((0x8000 | (ch << 12) | 0x0100) >> 8, (0x8000 | (ch << 12) | 0x0100) & 0xFF)
+        for ch in range(4)
+    )
+    
+    # Simulator value ranges: BME280 (temperature °C, humidity %, pressure hPa), ADS1115 volts per channel
+    _BME280_SIM_LOW = np.array([15.0, 30.0, 963.25])
+    _BME280_SIM_HIGH = np.array([35.0, 70.0, 1063.25])
+    _ADS1115_SIM_BASE = np.array([2.45, 1.23, 3.78, 0.89])
+    
+    def __init__(self, bus_number: int = 1, simulator: bool = False, seed: Optional[int] = None):
         self.bus_number = bus_number
         self.simulator = simulator
+        self.seed = seed
         self.bus = None
         self.devices = {}
         self.scan_results = []
+        self._ads1115_lock = None  # Created lazily on the running loop
+        self._bme280_verified = set()  # Addresses whose chip ID has been checked
         
         if not simulator:
             try:
                 import smbus2
                 self.bus = smbus2.SMBus(bus_number)
+                self._i2c_msg = smbus2.i2c_msg
                 logger.info(f"I2C bus {bus_number} initialized")
             except ImportError:
                 logger.warning("smbus2 not found, using simulator")
@@ -57,6 +78,11 @@ class I2CHandler:
     def _init_simulator(self):
         """Initialize I2C simulator with virtual devices"""
         logger.info("I2C Simulator initialized")
+        # Per-handler generator (no shared global RNG state); seed for reproducible runs
+        self._rng = np.random.default_rng(self.seed)
+        # Precomputed register jitter, cycled through instead of drawing per read
+        self._jitter_table = self._rng.integers(-5, 6, 256).tolist()
+        self._jitter_idx = 0
         
         # Simulate BME280 sensor
         self.devices[0x76] = I2CDevice(
@@ -93,19 +119,21 @@ class I2CHandler:
         
         self.scan_results = list(self.devices.keys())
     
-    def scan(self) -> List[int]:
-        """Scan I2C bus for devices"""
+    def scan(self, full: bool = False) -> List[int]:
+        """Scan I2C bus for devices (known addresses only unless full=True)"""
         if self.simulator:
             return self.scan_results
         
+        addresses = range(0x03, 0x78) if full else self._PROBE_ADDRS
         devices = []
-        for addr in range(0x03, 0x78):
+        for addr in addresses:
             try:
-                self.bus.read_byte(addr)
+                # Zero-length write: only checks for an address ACK, no data transfer
+                self.bus.i2c_rdwr(self._i2c_msg.write(addr, []))
                 devices.append(addr)
-            except:
+            except OSError:
                 pass
-        return devices
+        return sorted(devices)
     
     def read_byte(self, address: int, register: int) -> int:
         """Read single byte from I2C device"""
@@ -113,11 +141,10 @@ class I2CHandler:
             if address in self.devices and register in self.devices[address].registers:
                 value = self.devices[address].registers[register]
                 # Add some realistic sensor variation
-                if address == 0x76:  # BME280
-                    if register in [0xFA, 0xFB, 0xFC]:  # Temperature
-                        value += random.randint(-5, 5)
-                    elif register in [0xFD, 0xFE]:  # Humidity
-                        value += random.randint(-10, 10)
+                if address == 0x76 and 0xFA <= register <= 0xFE:  # BME280 temperature/humidity
+                    self._jitter_idx = (self._jitter_idx + 1) & 0xFF
+                    jitter = self._jitter_table[self._jitter_idx]
+                    value += jitter if register <= 0xFC else jitter * 2
                 return value & 0xFF
             else:
                 raise IOError(f"Device 0x{address:02X} register 0x{register:02X} not found")
@@ -130,7 +157,7 @@ class I2CHandler:
             if address in self.devices:
                 if register not in self.devices[address].read_only:
                     self.devices[address].registers[register] = value
-                    logger.debug(f"I2C Write: 0x{address:02X}[0x{register:02X}] = 0x{value:02X}")
+                    logger.debug("I2C Write: 0x%02X[0x%02X] = 0x%02X", address, register, value)
                 else:
                     raise IOError(f"Register 0x{register:02X} is read-only")
             else:
@@ -148,31 +175,46 @@ class I2CHandler:
         
         return self.bus.read_word_data(address, register)
     
+    def read_block(self, address: int, register: int, length: int) -> List[int]:
+        """Read consecutive registers from I2C device in a single burst transaction"""
+        if self.simulator:
+            if address not in self.devices:
+                raise IOError(f"Device 0x{address:02X} not found")
+            registers = self.devices[address].registers
+            try:
+                return [registers[reg] & 0xFF for reg in range(register, register + length)]
+            except KeyError as e:
+                raise IOError(f"Device 0x{address:02X} register 0x{e.args[0]:02X} not found")
+        
+        return self.bus.read_i2c_block_data(address, register, length)
+    
     def read_bme280(self, address: int = 0x76) -> Dict[str, float]:
         """Read BME280 sensor data (simplified)"""
         try:
-            # Check chip ID
-            chip_id = self.read_byte(address, 0xD0)
-            if chip_id != 0x60:
-                raise ValueError(f"Invalid BME280 chip ID: 0x{chip_id:02X}")
+            # Check chip ID once per address
+            if address not in self._bme280_verified:
+                chip_id = self.read_byte(address, 0xD0)
+                if chip_id != 0x60:
+                    raise ValueError(f"Invalid BME280 chip ID: 0x{chip_id:02X}")
+                self._bme280_verified.add(address)
             
             if self.simulator:
-                # Simulate realistic sensor values with some variation
-                temp = 20.0 + random.uniform(-5, 15)  # 15-35°C
-                humidity = 45.0 + random.uniform(-15, 25)  # 30-70%
-                pressure = 1013.25 + random.uniform(-50, 50)  # ±50 hPa
+                # Simulate realistic sensor values with one vectorized draw
+                temp, humidity, pressure = self._rng.uniform(self._BME280_SIM_LOW, self._BME280_SIM_HIGH)
                 
                 return {
-                    'temperature': round(temp, 2),
-                    'humidity': round(humidity, 1),
-                    'pressure': round(pressure, 2)
+                    'temperature': round(float(temp), 2),
+                    'humidity': round(float(humidity), 1),
+                    'pressure': round(float(pressure), 2)
                 }
             
             # Real BME280 reading would need calibration coefficients
             # This is a simplified version
-            temp_raw = self.read_word(address, 0xFA) >> 4
-            humidity_raw = self.read_word(address, 0xFD)
-            pressure_raw = self.read_word(address, 0xF7) >> 4
+            # Burst-read pressure, temperature and humidity (0xF7..0xFE) in one transaction
+            block = self.read_block(address, 0xF7, 8)
+            pressure_raw, temp_raw, humidity_raw = _BME280_STRUCT.unpack(bytes(block))
+            temp_raw >>= 4
+            pressure_raw >>= 4
             
             # Convert to physical values (simplified)
             temperature = temp_raw / 100.0  # Simplified conversion
@@ -186,31 +228,76 @@ class I2CHandler:
             }
             
         except Exception as e:
+            if isinstance(e, IOError):
+                # Bus glitch or device swap: re-probe chip ID on next read
+                self._bme280_verified.discard(address)
             logger.error(f"BME280 read error: {e}")
             return {'temperature': 0, 'humidity': 0, 'pressure': 0}
     
+    # ADS1115 conversion polling: OS bit (config MSB bit 7) is set once conversion is done.
+    # Slowest data rate is 8 SPS (125 ms), so give up after 200 ms.
+    ADS1115_POLL_INTERVAL = 0.001
+    ADS1115_CONVERSION_TIMEOUT = 0.2
+    
+    def _simulate_ads1115(self, channel: int) -> float:
+        """Simulate ADC readings for different channels"""
+        return float(self._ADS1115_SIM_BASE[channel & 3] + self._rng.uniform(-0.1, 0.1))
+    
+    def _ads1115_start(self, address: int, channel: int):
+        """Start single-shot conversion on channel (one 2-byte config write)"""
+        self.bus.write_i2c_block_data(address, 0x01, list(self._ADS1115_CONFIG[channel & 3]))
+    
+    def _ads1115_ready(self, address: int) -> bool:
+        """Check conversion-ready (OS) bit of the config register"""
+        return bool(self.read_byte(address, 0x01) & 0x80)
+    
+    def _ads1115_result(self, address: int) -> float:
+        """Read conversion result as voltage"""
+        result = self.read_word(address, 0x00)
+        return (result / 32767.0) * 4.096  # FS = 4.096V for gain=1
+    
     def read_ads1115(self, address: int = 0x48, channel: int = 0) -> float:
         """Read ADS1115 ADC value"""
         try:
             if self.simulator:
-                # Simulate ADC readings for different channels
-                base_values = [2.45, 1.23, 3.78, 0.89]  # Different voltages per channel
-                variation = random.uniform(-0.1, 0.1)
-                return base_values[channel % 4] + variation
+                return self._simulate_ads1115(channel)
+            
+            self._ads1115_start(address, channel)
+            
+            # Poll for conversion ready instead of waiting a worst-case fixed delay
+            deadline = time.monotonic() + self.ADS1115_CONVERSION_TIMEOUT
+            while not self._ads1115_ready(address):
+                if time.monotonic() > deadline:
+                    raise TimeoutError("conversion not ready")
+                time.sleep(self.ADS1115_POLL_INTERVAL)
             
-            # Configure for single-shot mode, channel selection
-            config = 0x8000 | (channel << 12) | 0x0100  # Single-shot, channel, gain=1
-            self.write_byte(address, 0x01, config >> 8)
-            self.write_byte(address, 0x01, config & 0xFF)
+            return self._ads1115_result(address)
             
-            # Wait for conversion
-            time.sleep(0.01)
+        except Exception as e:
+            logger.error(f"ADS1115 read error: {e}")
+            return 0.0
+    
+    async def read_ads1115_async(self, address: int = 0x48, channel: int = 0) -> float:
+        """Read ADS1115 ADC value, yielding to the event loop while converting"""
+        try:
+            if self.simulator:
+                return self._simulate_ads1115(channel)
             
-            # Read conversion result
-            result = self.read_word(address, 0x00)
-            voltage = (result / 32767.0) * 4.096  # FS = 4.096V for gain=1
+            # One multiplexer per chip: concurrent callers must not interleave conversions
+            if self._ads1115_lock is None:
+                self._ads1115_lock = asyncio.Lock()
             
-            return voltage
+            async with self._ads1115_lock:
+                self._ads1115_start(address, channel)
+                
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.ADS1115_CONVERSION_TIMEOUT
+                while not self._ads1115_ready(address):
+                    if loop.time() > deadline:
+                        raise TimeoutError("conversion not ready")
+                    await asyncio.sleep(self.ADS1115_POLL_INTERVAL)
+                
+                return self._ads1115_result(address)
             
         except Exception as e:
             logger.error(f"ADS1115 read error: {e}")
@@ -218,25 +305,38 @@ class I2CHandler:
     
     async def continuous_monitoring(self, callback, interval: float = 1.0):
         """Start continuous monitoring of all I2C devices"""
+        # Bind hot lookups to locals once for the lifetime of the loop
+        sleep = asyncio.sleep
+        gather = asyncio.gather
+        to_thread = asyncio.to_thread
+        read_bme280 = self.read_bme280
+        read_ads1115_async = self.read_ads1115_async
+        
         while True:
             try:
                 # Read all available sensors
                 data = {}
                 
                 if 0x76 in self.devices:  # BME280
-                    bme_data = self.read_bme280(0x76)
+                    if self.simulator:
+                        bme_data = read_bme280(0x76)
+                    else:
+                        # Blocking smbus2 transfer: keep it off the event loop
+                        bme_data = await to_thread(read_bme280, 0x76)
                     data.update(bme_data)
                 
                 if 0x48 in self.devices:  # ADS1115
-                    for ch in range(4):
-                        voltage = self.read_ads1115(0x48, ch)
+                    voltages = await gather(
+                        *(read_ads1115_async(0x48, ch) for ch in range(4))
+                    )
+                    for ch, voltage in enumerate(voltages):
                         data[f'adc_ch{ch}'] = voltage
                 
                 # Call the callback with sensor data
                 await callback(data)
                 
-                await asyncio.sleep(interval)
+                await sleep(interval)
                 
             except Exception as e:
-                logger.error(f"I2C monitoring error: {e}")
-                await asyncio.sleep(interval)
+                logger.error("I2C monitoring error: %s", e)
+                await sleep(interval)
@@ -3,17 +3,84 @@ I2S Audio Protocol Handler with simulator support
 Supports: Audio input/output, analysis, tone generation
 """
 import asyncio
+import functools
 import numpy as np
 import time
 import threading
+from collections import deque
 from typing import Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 import logging
 import math
-import random
+import os
+
+try:
+    from scipy import fft as _fft
+    from scipy.signal import find_peaks, welch
+    HAS_SCIPY = True
+except ImportError:
+    from numpy import fft as _fft
+    find_peaks = None
+    welch = None
+    HAS_SCIPY = False
+
+try:
+    import pyfftw
+    # Keep FFTW plans alive between analyze_audio calls (monitoring reuses sizes)
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60)
+    HAS_PYFFTW = True
+except ImportError:
+    HAS_PYFFTW = False
+
+# Buffers above this size are worth spreading over several FFT threads
+_FFT_THREADED_MIN = 32768
+_FFT_THREADS = os.cpu_count() or 1
 
 logger = logging.getLogger('I2S')
 
+@functools.lru_cache(maxsize=8)
+def _time_base(sample_rate: int, duration: float, dtype: str) -> np.ndarray:
+    """Sample times for a tone of the given duration (cached, read-only)"""
+    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False, dtype=dtype)
+    t.flags.writeable = False
+    return t
+
+def _rfft(x: np.ndarray) -> np.ndarray:
+    """Real-input FFT on the fastest available backend"""
+    threaded = len(x) > _FFT_THREADED_MIN
+    if HAS_PYFFTW:
+        return pyfftw.interfaces.numpy_fft.rfft(x, threads=_FFT_THREADS if threaded else 1)
+    if HAS_SCIPY and threaded:
+        return _fft.rfft(x, workers=-1)
+    return _fft.rfft(x)
+
+def _to_mono(audio_data: np.ndarray) -> np.ndarray:
+    """Downmix to a 1-D float32 signal"""
+    if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
+        return audio_data.mean(axis=1, dtype=np.float32)
+    return audio_data.reshape(-1).astype(np.float32, copy=False)
+
+def _welch_psd(x: np.ndarray, fs: int, nperseg: int):
+    """Welch PSD (Hann window, 50% overlap); NumPy fallback when scipy is missing"""
+    if welch is not None:
+        return welch(x, fs=fs, nperseg=nperseg)
+    window = np.hanning(nperseg + 1)[:-1].astype(np.float32)  # Periodic Hann, as scipy
+    segments = np.lib.stride_tricks.sliding_window_view(x, nperseg)[::nperseg // 2]
+    segments = segments - segments.mean(axis=1, keepdims=True)
+    psd = np.square(np.abs(np.fft.rfft(segments * window, axis=1))).mean(axis=0)
+    psd /= fs * np.square(window).sum()
+    psd[1:-1 if nperseg % 2 == 0 else None] *= 2  # One-sided
+    return np.fft.rfftfreq(nperseg, 1 / fs), psd
+
+def _local_peaks(magnitude: np.ndarray, threshold: float) -> np.ndarray:
+    """Indices of local maxima above threshold, in ascending order"""
+    if find_peaks is not None:
+        return find_peaks(magnitude, height=threshold)[0]
+    m = magnitude
+    mask = (m[1:-1] > m[:-2]) & (m[1:-1] > m[2:]) & (m[1:-1] > threshold)
+    return np.flatnonzero(mask) + 1
+
 @dataclass
 class AudioConfig:
     """I2S Audio configuration"""
@@ -30,13 +97,15 @@ class I2SHandler:
         self.simulator = simulator
         self.is_recording = False
         self.is_playing = False
-        self.audio_buffer = []
         self.callbacks = []
+        self._stop_event: Optional[asyncio.Event] = None
+        self._chunk_q = deque()  # Raw input chunks handed over by the PortAudio callback
         
         # Audio processing
         self.sample_rate = self.config.sample_rate
         self.channels = self.config.channels
         self.bit_depth = self.config.bit_depth
+        self._reset_buffer()
         
         if not simulator:
             try:
@@ -60,6 +129,39 @@ class I2SHandler:
         # Generate some test waveforms
         self.test_frequencies = [440, 880, 1760, 2000]  # A4, A5, A6, B6
         self.current_tone = 0
+        
+        # Simulated recording chord: sample_rate and chunk length never change,
+        # so the (3, N) sine matrix is built once and mixed with a dot product
+        self._sim_chunk_duration = 0.1  # 100ms chunks
+        self._sim_samples = int(self.sample_rate * self._sim_chunk_duration)
+        self._sim_t = np.linspace(0, self._sim_chunk_duration, self._sim_samples,
+                                  endpoint=False, dtype=np.float32)
+        chord = np.array([440, 880, 1320], dtype=np.float32)  # Musical chord
+        self._sim_sines = np.sin((2 * np.pi * chord)[:, None] * self._sim_t[None, :])
+    
+    def _reset_buffer(self, capacity: Optional[int] = None):
+        """Allocate an empty int16 recording buffer (one row per frame)"""
+        capacity = capacity or self.sample_rate  # one second to start with
+        self.audio_buffer = np.empty((capacity, self.channels), dtype=np.int16)
+        self._buf_len = 0
+    
+    def _append_chunk(self, chunk: np.ndarray):
+        """Copy a chunk of frames into the recording buffer, doubling it when full"""
+        frames = chunk.reshape(-1, self.channels)
+        n = len(frames)
+        end = self._buf_len + n
+        if end > len(self.audio_buffer):
+            grown = np.empty((max(end, 2 * len(self.audio_buffer)), self.channels), dtype=np.int16)
+            grown[:self._buf_len] = self.audio_buffer[:self._buf_len]
+            self.audio_buffer = grown
+        self.audio_buffer[self._buf_len:end] = frames
+        self._buf_len = end
+    
+    def _drain_chunks(self):
+        """Move chunks queued by the input callback into the recording buffer"""
+        chunk_q = self._chunk_q
+        while chunk_q:
+            self._append_chunk(chunk_q.popleft())
     
     def list_devices(self) -> List[Dict[str, Any]]:
         """List available audio devices"""
@@ -82,22 +184,25 @@ class I2SHandler:
     
     def generate_tone(self, frequency: float, duration: float, amplitude: float = 0.5) -> np.ndarray:
         """Generate a sine wave tone"""
-        samples = int(self.sample_rate * duration)
-        t = np.linspace(0, duration, samples, False)
+        if self.bit_depth == 16:
+            scale, out_dtype = 32767, np.int16
+        elif self.bit_depth == 32:
+            scale, out_dtype = 2147483647, np.int32
+        else:
+            scale, out_dtype = 1, np.float64
         
-        # Generate stereo sine wave
+        # float32 is plenty for 16-bit output; wider formats keep float64 precision
+        t = _time_base(self.sample_rate, duration, 'float32' if self.bit_depth == 16 else 'float64')
+        samples = len(t)
+        wave = np.sin((2 * np.pi * frequency) * t)
+        
+        # Compute the sine once, then scale it into every channel of the output
         if self.channels == 2:
-            left = amplitude * np.sin(2 * np.pi * frequency * t)
-            right = amplitude * np.sin(2 * np.pi * frequency * t)
-            audio_data = np.column_stack((left, right))
+            audio_data = np.empty((samples, 2), dtype=out_dtype)
+            wave = wave[:, None]
         else:
-            audio_data = amplitude * np.sin(2 * np.pi * frequency * t)
-        
-        # Convert to appropriate bit depth
-        if self.bit_depth == 16:
-            audio_data = (audio_data * 32767).astype(np.int16)
-        elif self.bit_depth == 32:
-            audio_data = (audio_data * 2147483647).astype(np.int32)
+            audio_data = np.empty(samples, dtype=out_dtype)
+        np.multiply(wave, amplitude * scale, out=audio_data, casting='unsafe')
         
         return audio_data
     
@@ -107,33 +212,32 @@ class I2SHandler:
             return {"error": "No audio data"}
         
         try:
-            # Convert to mono if stereo
-            if len(audio_data.shape) > 1 and audio_data.shape[1] > 1:
-                mono_data = np.mean(audio_data, axis=1)
-            else:
-                mono_data = audio_data.flatten()
+            # Convert to mono if stereo; analysis runs in float32 throughout
+            mono_data = _to_mono(audio_data)
             
             # Calculate RMS level
-            rms = np.sqrt(np.mean(mono_data.astype(float) ** 2))
-            db_level = 20 * np.log10(rms / 32767.0) if rms > 0 else -120
+            rms = float(np.sqrt(np.mean(np.square(mono_data), dtype=np.float32)))
+            db_level = 20 * math.log10(rms / 32767.0) if rms > 0 else -120
             
-            # FFT for frequency analysis
-            fft = np.fft.fft(mono_data)
-            freqs = np.fft.fftfreq(len(fft), 1/self.sample_rate)
-            magnitude = np.abs(fft[:len(fft)//2])
+            # Real-input FFT for frequency analysis (N/2+1 non-negative bins, complex64)
+            fft = _rfft(mono_data)
+            freqs = _fft.rfftfreq(len(mono_data), 1/self.sample_rate)
+            magnitude = np.abs(fft)
             
-            # Find dominant frequency
-            dominant_freq_idx = np.argmax(magnitude[1:]) + 1  # Skip DC component
-            dominant_frequency = abs(freqs[dominant_freq_idx])
+            # Peak detection (local maxima above 10% of max); the tallest is dominant
+            m = magnitude
+            peak_indices = _local_peaks(m, m.max() * 0.1)
+            if len(peak_indices):
+                dominant_freq_idx = peak_indices[np.argmax(m[peak_indices])]
+            else:
+                dominant_freq_idx = np.argmax(m[1:]) + 1  # Skip DC component
+            dominant_frequency = freqs[dominant_freq_idx]
             
-            # Peak detection
-            peak_indices = []
-            threshold = np.max(magnitude) * 0.1  # 10% of max
-            for i in range(1, len(magnitude)-1):
-                if magnitude[i] > magnitude[i-1] and magnitude[i] > magnitude[i+1] and magnitude[i] > threshold:
-                    peak_indices.append(i)
+            if len(peak_indices) > 5:
+                peak_indices = peak_indices[np.argpartition(m[peak_indices], -5)[-5:]]
+            peak_indices = peak_indices[np.argsort(m[peak_indices])[::-1]]
             
-            peaks = [(abs(freqs[i]), magnitude[i]) for i in peak_indices[:5]]  # Top 5 peaks
+            peaks = [(float(freqs[i]), float(m[i])) for i in peak_indices]  # Top 5 peaks
             
             return {
                 "rms_level": rms,
@@ -148,6 +252,45 @@ class I2SHandler:
             logger.error(f"Audio analysis error: {e}")
             return {"error": str(e)}
     
+    def analyze_audio_fast(self, audio_data: np.ndarray) -> Dict[str, Any]:
+        """Level-only analysis (RMS and dB, no FFT)"""
+        if audio_data is None or len(audio_data) == 0:
+            return {"error": "No audio data"}
+        
+        mono_data = _to_mono(audio_data)
+        rms = float(np.sqrt(np.mean(np.square(mono_data), dtype=np.float32)))
+        db_level = 20 * math.log10(rms / 32767.0) if rms > 0 else -120
+        
+        return {
+            "rms_level": rms,
+            "db_level": round(db_level, 2),
+            "sample_rate": self.sample_rate,
+            "duration": len(mono_data) / self.sample_rate
+        }
+    
+    def analyze_psd(self, audio_data: np.ndarray, nperseg: int = 1024) -> Dict[str, Any]:
+        """Coarse, smoothed spectrum peaks from a Welch PSD"""
+        if audio_data is None or len(audio_data) == 0:
+            return {"error": "No audio data"}
+        
+        try:
+            mono_data = _to_mono(audio_data)
+            freqs, psd = _welch_psd(mono_data, self.sample_rate, min(nperseg, len(mono_data)))
+            
+            peak_indices = _local_peaks(psd, psd.max() * 0.1)
+            if not len(peak_indices):
+                peak_indices = np.array([np.argmax(psd[1:]) + 1])  # Skip DC component
+            peak_indices = peak_indices[np.argsort(psd[peak_indices])[::-1][:5]]
+            
+            return {
+                "dominant_frequency": round(float(freqs[peak_indices[0]]), 2),
+                "peaks": [(float(freqs[i]), float(psd[i])) for i in peak_indices]
+            }
+            
+        except Exception as e:
+            logger.error(f"PSD analysis error: {e}")
+            return {"error": str(e)}
+    
     async def start_recording(self, callback: Optional[Callable] = None, duration: Optional[float] = None):
         """Start audio recording"""
         if self.is_recording:
@@ -155,7 +298,8 @@ class I2SHandler:
             return
         
         self.is_recording = True
-        self.audio_buffer = []
+        self._stop_event = asyncio.Event()
+        self._reset_buffer()
         logger.info("Started I2S recording")
         
         if callback:
@@ -166,36 +310,34 @@ class I2SHandler:
         else:
             await self._real_recording(duration)
     
+    def _simulate_chunk(self) -> np.ndarray:
+        """Generate one chunk of simulated audio (mix of tones and noise)"""
+        samples = self._sim_samples
+        
+        # Mix the test tones with random amplitudes in one pass, then add noise
+        amps = np.random.uniform(0.1, 0.3, 3).astype(np.float32)
+        audio_chunk = amps @ self._sim_sines
+        noise = np.random.normal(0, 0.1, samples).astype(np.float32)
+        noise *= np.random.uniform(0.05, 0.15)
+        audio_chunk += noise
+        
+        # Scale and convert to stereo int16 in one broadcast pass
+        if self.channels == 2:
+            audio_data = np.empty((samples, 2), dtype=np.int16)
+            audio_chunk = audio_chunk[:, None]
+        else:
+            audio_data = np.empty(samples, dtype=np.int16)
+        np.multiply(audio_chunk, 32767, out=audio_data, casting='unsafe')
+        
+        return audio_data
+    
     async def _simulate_recording(self, duration: Optional[float] = None):
         """Simulate audio recording"""
         start_time = time.time()
         
         while self.is_recording:
-            # Generate some simulated audio data (mix of tones and noise)
-            chunk_duration = 0.1  # 100ms chunks
-            samples = int(self.sample_rate * chunk_duration)
-            
-            # Mix multiple frequencies with noise
-            t = np.linspace(0, chunk_duration, samples, False)
-            audio_chunk = np.zeros(samples)
-            
-            # Add some test tones with random amplitudes
-            for freq in [440, 880, 1320]:  # Musical chord
-                amplitude = random.uniform(0.1, 0.3)
-                audio_chunk += amplitude * np.sin(2 * np.pi * freq * t)
-            
-            # Add some noise
-            noise = random.uniform(0.05, 0.15) * np.random.normal(0, 0.1, samples)
-            audio_chunk += noise
-            
-            # Convert to stereo int16
-            if self.channels == 2:
-                stereo_chunk = np.column_stack((audio_chunk, audio_chunk))
-            else:
-                stereo_chunk = audio_chunk
-            
-            audio_data = (stereo_chunk * 32767).astype(np.int16)
-            self.audio_buffer.extend(audio_data)
+            audio_data = self._simulate_chunk()
+            self._append_chunk(audio_data)
             
             # Call callbacks with chunk
             for callback in self.callbacks:
@@ -204,7 +346,7 @@ class I2SHandler:
                 except Exception as e:
                     logger.error(f"Callback error: {e}")
             
-            await asyncio.sleep(chunk_duration)
+            await asyncio.sleep(self._sim_chunk_duration)
             
             # Check duration limit
             if duration and (time.time() - start_time) >= duration:
@@ -212,9 +354,13 @@ class I2SHandler:
     
     async def _real_recording(self, duration: Optional[float] = None):
         """Real audio recording using PyAudio"""
+        # The PortAudio callback must stay realtime-safe: it only enqueues a view of
+        # the (immutable) input bytes, and chunks are copied into the buffer on stop
+        chunk_q = self._chunk_q
+        chunk_q.clear()
+        
         def audio_callback(in_data, frame_count, time_info, status):
-            audio_data = np.frombuffer(in_data, dtype=np.int16)
-            self.audio_buffer.extend(audio_data)
+            chunk_q.append(np.frombuffer(in_data, dtype=np.int16))
             return (in_data, self.pyaudio.paContinue)
         
         stream = self.pa.open(
@@ -228,27 +374,34 @@ class I2SHandler:
         
         stream.start_stream()
         
-        start_time = time.time()
-        while self.is_recording:
-            await asyncio.sleep(0.1)
-            if duration and (time.time() - start_time) >= duration:
-                break
+        # Sleep until stop_recording() or the duration limit, whichever comes first
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=duration or None)
+        except asyncio.TimeoutError:
+            pass
         
         stream.stop_stream()
         stream.close()
+        self._drain_chunks()
     
     def stop_recording(self) -> np.ndarray:
         """Stop recording and return recorded audio"""
         self.is_recording = False
         self.callbacks.clear()
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._drain_chunks()
         
-        if self.audio_buffer:
-            audio_array = np.array(self.audio_buffer, dtype=np.int16)
+        if self._buf_len:
+            # View into the buffer, a new one is allocated on the next recording
+            audio_array = self.audio_buffer[:self._buf_len]
+            if self.channels == 1:
+                audio_array = audio_array[:, 0]
             logger.info(f"Stopped recording: {len(audio_array)} samples")
             return audio_array
         else:
             logger.warning("No audio data recorded")
-            return np.array([])
+            return np.array([], dtype=np.int16)
     
     async def play_audio(self, audio_data: np.ndarray):
         """Play audio data"""
@@ -276,9 +429,10 @@ class I2SHandler:
         duration = len(audio_data) / (self.sample_rate * self.channels)
         logger.info(f"Simulating playback of {duration:.2f}s audio")
         
-        # Analyze what we're "playing"
-        analysis = self.analyze_audio(audio_data)
-        logger.info(f"Playing audio: {analysis.get('dominant_frequency', 0):.1f}Hz, {analysis.get('db_level', -120):.1f}dB")
+        # Analyze what we're "playing" (only for the log line, so at most the first second)
+        if logger.isEnabledFor(logging.INFO):
+            analysis = self.analyze_audio(audio_data[:self.sample_rate])
+            logger.info(f"Playing audio: {analysis.get('dominant_frequency', 0):.1f}Hz, {analysis.get('db_level', -120):.1f}dB")
         
         await asyncio.sleep(duration)
     
@@ -307,25 +461,68 @@ class I2SHandler:
         tone_data = self.generate_tone(frequency, duration, amplitude)
         await self.play_audio(tone_data)
     
-    async def continuous_monitoring(self, callback, interval: float = 0.5):
+    async def continuous_monitoring(self, callback, interval: float = 0.5, full_analysis: bool = False):
         """Start continuous audio monitoring"""
+        # Level plus a coarse Welch spectrum by default; full-resolution FFT on demand
+        analyze = self.analyze_audio if full_analysis else self._monitoring_analysis
+        if self.simulator:
+            await self._simulate_monitoring(callback, interval, analyze)
+        else:
+            await self._real_monitoring(callback, interval, analyze)
+    
+    def _monitoring_analysis(self, audio_data: np.ndarray) -> Dict[str, Any]:
+        """Cheap per-tick analysis: level and coarse dominant frequency"""
+        analysis = self.analyze_audio_fast(audio_data)
+        analysis.update(self.analyze_psd(audio_data))
+        return analysis
+    
+    async def _simulate_monitoring(self, callback, interval: float, analyze: Callable):
+        """Analyze a fresh simulated 100ms chunk every interval"""
         while True:
             try:
-                # Record a short sample for analysis
-                await self.start_recording(duration=0.1)
-                await asyncio.sleep(0.1)
-                recorded = self.stop_recording()
-                
-                if len(recorded) > 0:
-                    analysis = self.analyze_audio(recorded)
-                    await callback(analysis)
-                
+                analysis = analyze(self._simulate_chunk())
+                await callback(analysis)
                 await asyncio.sleep(interval)
                 
             except Exception as e:
                 logger.error(f"I2S monitoring error: {e}")
                 await asyncio.sleep(interval)
     
+    async def _real_monitoring(self, callback, interval: float, analyze: Callable):
+        """Analyze the newest 100ms chunk of one long-lived input stream every interval"""
+        # Opening/closing a PortAudio stream per tick is expensive, so the stream stays
+        # open and the callback only keeps the most recent chunk
+        latest = deque(maxlen=1)
+        
+        def audio_callback(in_data, frame_count, time_info, status):
+            latest.append(in_data)
+            return (in_data, self.pyaudio.paContinue)
+        
+        stream = self.pa.open(
+            format=self.pa.get_format_from_width(self.bit_depth // 8),
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.sample_rate // 10,
+            stream_callback=audio_callback
+        )
+        stream.start_stream()
+        
+        try:
+            while True:
+                try:
+                    await asyncio.sleep(interval)
+                    if latest:
+                        chunk = np.frombuffer(latest.pop(), dtype=np.int16).reshape(-1, self.channels)
+                        analysis = analyze(chunk)
+                        await callback(analysis)
+                    
+                except Exception as e:
+                    logger.error(f"I2S monitoring error: {e}")
+        finally:
+            stream.stop_stream()
+            stream.close()
+    
     def __del__(self):
         """Cleanup audio resources"""
         if hasattr(self, 'pa') and self.pa:
@@ -4,15 +4,89 @@ Supports: Modbus RTU, Modbus ASCII, custom protocols
 """
 import asyncio
 import struct
+import sys
+import threading
+from array import array
 import time
-import random
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 logger = logging.getLogger('RS485')
 
+# Request payload shared by the read/write-single functions: address + count/value
+_REQUEST_STRUCT = struct.Struct('>HH')
+
+# Upper bound in seconds on how long a cached coil read is trusted
+COIL_CACHE_TTL = 1.0
+
+def _build_crc16_table() -> Tuple[int, ...]:
+    """Reflected CRC-16/Modbus (poly 0xA001) lookup table"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+_CRC16_TABLE = _build_crc16_table()
+
+def _build_crc16_wide_table() -> array:
+    """65536-entry table that advances the CRC by two bytes per lookup"""
+    table = np.array(_CRC16_TABLE, dtype=np.uint16)
+    x = np.arange(0x10000, dtype=np.uint16)
+    t_lo = table[x & 0xFF]
+    wide = (t_lo >> 8) ^ table[((x >> 8) ^ t_lo) & 0xFF]
+    return array('H', wide.tobytes())
+
+_CRC16_WIDE_TABLE = _build_crc16_wide_table()
+
+# Frames shorter than these are faster on the simpler path
+_CRC16_WIDE_MIN_LEN = 32
+_CRC16_JIT_MIN_LEN = 64
+
+def _crc16_modbus(data: bytes) -> int:
+    """Table-driven Modbus CRC16, one lookup per byte"""
+    crc = 0xFFFF
+    table = _CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+def _crc16_modbus_wide(data: bytes) -> int:
+    """Modbus CRC16 folding two bytes per lookup (little-endian word stream)"""
+    even = len(data) & ~1
+    words = array('H')
+    words.frombytes(data[:even])
+    if sys.byteorder == 'big':
+        words.byteswap()
+    crc = 0xFFFF
+    table = _CRC16_WIDE_TABLE
+    for word in words:
+        crc = table[crc ^ word]
+    if even != len(data):
+        crc = (crc >> 8) ^ _CRC16_TABLE[(crc ^ data[-1]) & 0xFF]
+    return crc
+
+if HAS_NUMBA:
+    _CRC16_TABLE_NP = np.array(_CRC16_TABLE, dtype=np.uint16)
+
+    @njit(cache=True, boundscheck=False)
+    def _crc16_jit(buf, table):
+        crc = 0xFFFF
+        for b in buf:
+            crc = (crc >> 8) ^ table[(crc ^ b) & 0xFF]
+        return crc
+
 class ModbusFunction(Enum):
     """Modbus function codes"""
     READ_COILS = 0x01
@@ -37,19 +111,35 @@ class ModbusDevice:
 class RS485Handler:
     """RS485/Modbus Protocol Handler"""
     
+    # Simulated measurement noise: slave_id -> {holding register: +/- span}
+    _SIM_JITTER = {
+        1: {1: 5},           # Temperature
+        2: {1: 10, 2: 10},   # Power meter current/power
+        3: {1: 20},          # VFD actual frequency
+    }
+    
     def __init__(self, 
                  port: str = "/dev/ttyUSB0",
                  baudrate: int = 9600,
-                 simulator: bool = False):
+                 simulator: bool = False,
+                 seed: Optional[int] = None):
         self.port = port
         self.baudrate = baudrate
         self.simulator = simulator
+        self.seed = seed
         self.serial = None
         self.devices = {}
         
         # Modbus settings
         self.timeout = 1.0
         
+        # RS485 is half-duplex: one request/response transaction on the bus at a time
+        self._bus_lock = threading.Lock()
+        # Coil reads cached per (slave, address, count) as (state stamp, read time, coils);
+        # re-read on a write, a changed stamp or after COIL_CACHE_TTL
+        self._coil_cache: Dict[Tuple[int, int, int], Tuple[tuple, float, List[bool]]] = {}
+        self._scanned_devices: Optional[List[int]] = None
+        
         if not simulator:
             try:
                 import serial
@@ -74,6 +164,9 @@ class RS485Handler:
         """Initialize RS485 simulator with virtual devices"""
         logger.info("RS485/Modbus Simulator initialized")
         
+        # Per-handler generator for register noise; seed for reproducible runs
+        self._rng = np.random.default_rng(self.seed)
+        
         # Simulate temperature controller
         self.devices[1] = ModbusDevice(
             slave_id=1,
@@ -148,23 +241,24 @@ class RS485Handler:
         )
     
     def _calculate_crc16(self, data: bytes) -> int:
-        """Calculate Modbus CRC16"""
-        crc = 0xFFFF
-        for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                if crc & 1:
-                    crc = (crc >> 1) ^ 0xA001
-                else:
-                    crc >>= 1
-        return crc
+        """Calculate Modbus CRC16 over any bytes-like object"""
+        if HAS_NUMBA and len(data) >= _CRC16_JIT_MIN_LEN:
+            return int(_crc16_jit(np.frombuffer(data, dtype=np.uint8), _CRC16_TABLE_NP))
+        if len(data) >= _CRC16_WIDE_MIN_LEN:
+            return _crc16_modbus_wide(data)
+        return _crc16_modbus(data)
     
     def _build_modbus_frame(self, slave_id: int, function: int, data: bytes) -> bytes:
         """Build Modbus RTU frame with CRC"""
-        frame = struct.pack('BB', slave_id, function) + data
-        crc = self._calculate_crc16(frame)
-        frame += struct.pack('<H', crc)  # Little endian CRC
-        return frame
+        end = 2 + len(data)
+        frame = bytearray(end + 2)
+        frame[0] = slave_id
+        frame[1] = function
+        frame[2:end] = data
+        crc = self._calculate_crc16(memoryview(frame)[:end])
+        frame[end] = crc & 0xFF  # Little endian CRC
+        frame[end + 1] = crc >> 8
+        return bytes(frame)
     
     def _parse_modbus_frame(self, frame: bytes) -> Tuple[int, int, bytes, bool]:
         """Parse Modbus RTU frame and verify CRC"""
@@ -176,7 +270,7 @@ class RS485Handler:
         data = frame[2:-2]
         received_crc = struct.unpack('<H', frame[-2:])[0]
         
-        calculated_crc = self._calculate_crc16(frame[:-2])
+        calculated_crc = self._calculate_crc16(memoryview(frame)[:-2])
         crc_valid = received_crc == calculated_crc
         
         return slave_id, function, data, crc_valid
@@ -196,11 +290,12 @@ class RS485Handler:
                 raise Exception(f"Device {slave_id} not found")
         
         # Real Modbus communication
-        data = struct.pack('>HH', address, count)
+        data = _REQUEST_STRUCT.pack(address, count)
         frame = self._build_modbus_frame(slave_id, ModbusFunction.READ_COILS.value, data)
         
-        self.serial.write(frame)
-        response = self.serial.read(100)  # Read up to 100 bytes
+        with self._bus_lock:
+            self.serial.write(frame)
+            response = self.serial.read(100)  # Read up to 100 bytes
         
         slave, func, resp_data, crc_ok = self._parse_modbus_frame(response)
         if not crc_ok:
@@ -209,23 +304,43 @@ class RS485Handler:
         byte_count = resp_data[0]
         coil_bytes = resp_data[1:1+byte_count]
         
-        # Unpack bits
-        result = []
-        for i in range(count):
-            byte_idx = i // 8
-            bit_idx = i % 8
-            if byte_idx < len(coil_bytes):
-                result.append(bool(coil_bytes[byte_idx] & (1 << bit_idx)))
-            else:
-                result.append(False)
+        # Missing bytes in a short response read as False
+        needed = (count + 7) // 8
+        if len(coil_bytes) < needed:
+            coil_bytes = bytes(coil_bytes) + bytes(needed - len(coil_bytes))
         
-        return result
+        # Unpack bits (Modbus packs coil 0 into the LSB of the first byte)
+        bits = np.unpackbits(np.frombuffer(coil_bytes, dtype=np.uint8), count=count, bitorder='little')
+        return bits.astype(bool).tolist()
+    
+    def _read_coils_cached(self, slave_id: int, address: int, count: int, stamp: tuple = ()) -> List[bool]:
+        """
+        Read coils, reusing the last result while the device state looks unchanged
+        
+        stamp is status read in the same tick (e.g. setpoint and fault code); a trip or a
+        stop by another master changes it, forcing a fresh read. COIL_CACHE_TTL bounds
+        staleness for changes the stamp does not reflect.
+        """
+        key = (slave_id, address, count)
+        now = time.monotonic()
+        entry = self._coil_cache.get(key)
+        if entry is not None and entry[0] == stamp and now - entry[1] < COIL_CACHE_TTL:
+            return entry[2]
+        coils = self.read_coils(slave_id, address, count)
+        self._coil_cache[key] = (stamp, now, coils)
+        return coils
+    
+    def _invalidate_coils(self, slave_id: int):
+        """Drop cached coil reads for a device"""
+        for key in [k for k in self._coil_cache if k[0] == slave_id]:
+            del self._coil_cache[key]
     
     def write_single_coil(self, slave_id: int, address: int, value: bool):
         """Write single coil - Function 0x05"""
         if self.simulator:
             if slave_id in self.devices:
                 self.devices[slave_id].coils[address] = value
+                self._invalidate_coils(slave_id)
                 logger.debug(f"Write coil {address} = {value} on device {slave_id}")
                 
                 # Simulate device behavior
@@ -237,11 +352,13 @@ class RS485Handler:
         
         # Real Modbus communication
         coil_value = 0xFF00 if value else 0x0000
-        data = struct.pack('>HH', address, coil_value)
+        data = _REQUEST_STRUCT.pack(address, coil_value)
         frame = self._build_modbus_frame(slave_id, ModbusFunction.WRITE_SINGLE_COIL.value, data)
         
-        self.serial.write(frame)
-        response = self.serial.read(8)  # Fixed response length
+        with self._bus_lock:
+            self.serial.write(frame)
+            response = self.serial.read(8)  # Fixed response length
+        self._invalidate_coils(slave_id)
         
         slave, func, resp_data, crc_ok = self._parse_modbus_frame(response)
         if not crc_ok:
@@ -251,21 +368,18 @@ class RS485Handler:
         """Read holding registers - Function 0x03"""
         if self.simulator:
             if slave_id in self.devices:
-                device = self.devices[slave_id]
-                result = []
-                for i in range(count):
-                    reg_addr = address + i
-                    value = device.holding_registers.get(reg_addr, 0)
-                    
-                    # Add some variation to simulate real devices
-                    if slave_id == 1 and reg_addr == 1:  # Temperature
-                        value += random.randint(-5, 5)
-                    elif slave_id == 2 and reg_addr in [1, 2]:  # Power meter
-                        value += random.randint(-10, 10)
-                    elif slave_id == 3 and reg_addr == 1:  # VFD actual frequency
-                        value += random.randint(-20, 20)
-                    
-                    result.append(max(0, min(65535, value)))  # Clamp to 16-bit
+                regs = self.devices[slave_id].holding_registers
+                addrs = range(address, address + count)
+                values = np.fromiter((regs.get(a, 0) for a in addrs), dtype=np.int64, count=count)
+                
+                # Add some variation to simulate real devices, drawn in one batch
+                jitter = self._SIM_JITTER.get(slave_id)
+                if jitter:
+                    spans = np.fromiter((jitter.get(a, 0) for a in addrs), dtype=np.int64, count=count)
+                    if spans.any():
+                        values += self._rng.integers(-spans, spans + 1)
+                
+                result = np.clip(values, 0, 65535).tolist()  # Clamp to 16-bit
                 
                 logger.debug(f"Read {count} registers from device {slave_id} starting at {address}")
                 return result
@@ -273,11 +387,12 @@ class RS485Handler:
                 raise Exception(f"Device {slave_id} not found")
         
         # Real Modbus communication
-        data = struct.pack('>HH', address, count)
+        data = _REQUEST_STRUCT.pack(address, count)
         frame = self._build_modbus_frame(slave_id, ModbusFunction.READ_HOLDING_REGISTERS.value, data)
         
-        self.serial.write(frame)
-        response = self.serial.read(100)
+        with self._bus_lock:
+            self.serial.write(frame)
+            response = self.serial.read(100)
         
         slave, func, resp_data, crc_ok = self._parse_modbus_frame(response)
         if not crc_ok:
@@ -286,14 +401,8 @@ class RS485Handler:
         byte_count = resp_data[0]
         reg_bytes = resp_data[1:1+byte_count]
         
-        # Unpack 16-bit registers (big endian)
-        result = []
-        for i in range(0, len(reg_bytes), 2):
-            if i+1 < len(reg_bytes):
-                value = struct.unpack('>H', reg_bytes[i:i+2])[0]
-                result.append(value)
-        
-        return result
+        # Unpack 16-bit registers (big endian), ignoring a trailing odd byte
+        return np.frombuffer(reg_bytes, dtype='>u2', count=len(reg_bytes) // 2).tolist()
     
     def write_single_register(self, slave_id: int, address: int, value: int):
         """Write single register - Function 0x06"""
@@ -311,11 +420,12 @@ class RS485Handler:
                 raise Exception(f"Device {slave_id} not found")
         
         # Real Modbus communication
-        data = struct.pack('>HH', address, value)
+        data = _REQUEST_STRUCT.pack(address, value)
         frame = self._build_modbus_frame(slave_id, ModbusFunction.WRITE_SINGLE_REGISTER.value, data)
         
-        self.serial.write(frame)
-        response = self.serial.read(8)
+        with self._bus_lock:
+            self.serial.write(frame)
+            response = self.serial.read(8)
         
         slave, func, resp_data, crc_ok = self._parse_modbus_frame(response)
         if not crc_ok:
@@ -354,54 +464,74 @@ class RS485Handler:
             }
         return {"slave_id": slave_id, "name": f"Device {slave_id}"}
     
+    def _read_device(self, slave_id: int) -> Dict:
+        """Read the key registers of one device into a monitoring record"""
+        data = {"slave_id": slave_id}
+        
+        try:
+            # One block read per device covers every monitored register
+            if slave_id == 1:  # Temperature controller
+                regs = self.read_holding_registers(slave_id, 0, 5)
+                data.update({
+                    "setpoint": regs[0] / 10.0,
+                    "temperature": regs[1] / 10.0,
+                    "output_percent": regs[2],
+                    "status": regs[3],
+                    "alarms": regs[4]
+                })
+            elif slave_id == 2:  # Power meter
+                regs = self.read_holding_registers(slave_id, 0, 4)
+                data.update({
+                    "voltage": regs[0] / 10.0,
+                    "current": regs[1] / 10.0,
+                    "power": regs[2] / 1000.0,
+                    "power_factor": regs[3] / 1000.0
+                })
+            elif slave_id == 3:  # VFD
+                regs = self.read_holding_registers(slave_id, 0, 5)
+                # Setpoint and fault code change on a trip or an external stop/start
+                coils = self._read_coils_cached(slave_id, 0, 3, (regs[0], regs[4]))
+                data.update({
+                    "frequency_setpoint": regs[0] / 100.0,
+                    "frequency_actual": regs[1] / 100.0,
+                    "motor_speed": regs[2],
+                    "speed_reference": regs[3],
+                    "fault_code": regs[4],
+                    "running": coils[0],
+                    "forward": coils[1]
+                })
+        except Exception as e:
+            logger.error(f"Error reading device {slave_id}: {e}")
+            data["error"] = str(e)
+        
+        return data
+    
     async def continuous_monitoring(self, callback, devices: List[int] = None, interval: float = 1.0):
         """Start continuous monitoring of RS485/Modbus devices"""
         if devices is None:
-            devices = list(self.devices.keys()) if self.simulator else self.scan_devices()
+            if self.simulator:
+                devices = list(self.devices.keys())
+            else:
+                if self._scanned_devices is None:
+                    self._scanned_devices = self.scan_devices()
+                devices = self._scanned_devices
         
         while True:
             try:
-                for slave_id in devices:
-                    data = {"slave_id": slave_id}
-                    
+                if self.simulator:
+                    results = [self._read_device(slave_id) for slave_id in devices]
+                else:
+                    # Serial I/O runs off the event loop; the bus lock keeps the
+                    # transactions themselves in order on the wire
+                    results = await asyncio.gather(
+                        *(asyncio.to_thread(self._read_device, slave_id) for slave_id in devices)
+                    )
+                
+                for data in results:
                     try:
-                        # Read some key registers from each device
-                        if slave_id == 1:  # Temperature controller
-                            regs = self.read_holding_registers(slave_id, 0, 5)
-                            data.update({
-                                "setpoint": regs[0] / 10.0,
-                                "temperature": regs[1] / 10.0,
-                                "output_percent": regs[2],
-                                "status": regs[3],
-                                "alarms": regs[4]
-                            })
-                        elif slave_id == 2:  # Power meter
-                            regs = self.read_holding_registers(slave_id, 0, 4)
-                            data.update({
-                                "voltage": regs[0] / 10.0,
-                                "current": regs[1] / 10.0,
-                                "power": regs[2] / 1000.0,
-                                "power_factor": regs[3] / 1000.0
-                            })
-                        elif slave_id == 3:  # VFD
-                            regs = self.read_holding_registers(slave_id, 0, 5)
-                            coils = self.read_coils(slave_id, 0, 3)
-                            data.update({
-                                "frequency_setpoint": regs[0] / 100.0,
-                                "frequency_actual": regs[1] / 100.0,
-                                "motor_speed": regs[2],
-                                "speed_reference": regs[3],
-                                "fault_code": regs[4],
-                                "running": coils[0],
-                                "forward": coils[1]
-                            })
-                        
                         await callback(data)
-                        
                     except Exception as e:
-                        logger.error(f"Error reading device {slave_id}: {e}")
-                        data["error"] = str(e)
-                        await callback(data)
+                        logger.error(f"Callback error: {e}")
                 
                 await asyncio.sleep(interval)
                 
@@ -7,14 +7,28 @@ __version__ = "1.0.0"
 __author__ = "EDPM Team"
 __email__ = "info@edpm.dev"
 
-from .core.client import EDPMClient
 from .core.message import Message, MessageType
-from .core.server import EDPMServer
-from .web.dashboard import DashboardServer
-from .protocols.gpio import GPIOHandler
-from .protocols.i2c import I2CHandler
-from .protocols.i2s import I2SHandler
-from .protocols.rs485 import RS485Handler
+
+# Server, client, dashboard and protocol handlers pull in zmq, aiohttp and
+# hardware libraries, so they are imported on first attribute access
+_LAZY_IMPORTS = {
+    "EDPMClient": ".core.client",
+    "EDPMServer": ".core.server",
+    "DashboardServer": ".web.dashboard",
+    "GPIOHandler": ".protocols.gpio",
+    "I2CHandler": ".protocols.i2c",
+    "I2SHandler": ".protocols.i2s",
+    "RS485Handler": ".protocols.rs485",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     "EDPMClient",
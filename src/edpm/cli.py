@@ -4,18 +4,17 @@ EDPM CLI Entry Points
 Command-line interfaces for EDPM server, client, and dashboard components.
 """
 
+import os
 import sys
-import asyncio
+import atexit
+import queue
 import argparse
 import logging
-import signal
+import logging.handlers
 from pathlib import Path
 from typing import Optional
 
 from .core.config import Config
-from .core.server import EDPMServer
-from .core.client import EDPMClient
-from .web.dashboard import DashboardServer
 
 
 def setup_logging(level: str = "INFO", log_file: Optional[str] = None):
@@ -27,24 +26,40 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None):
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
-    # Setup root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
-    
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # File handler if specified
     if log_file:
-        file_handler = logging.FileHandler(log_file)
+        file_handler = logging.FileHandler(log_file, delay=True)
         file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    # The root logger only enqueues records; a listener thread does the writing
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    # Setup root logger
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level)
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     return root_logger
 
 
+def load_config(args) -> Config:
+    """Load configuration from --config (optionally via the parse cache) or the environment"""
+    if not args.config:
+        return Config.from_env()
+    if args.cache_config or os.getenv("EDPM_CACHE_CONFIG") == "1":
+        return Config.from_file_cached(args.config)
+    return Config.from_file(args.config)
+
+
 def create_base_parser() -> argparse.ArgumentParser:
     """Create base argument parser with common options"""
     parser = argparse.ArgumentParser(description="EDPM Lite - Edge Data Processing and Monitoring")
@@ -53,6 +68,11 @@ def create_base_parser() -> argparse.ArgumentParser:
         type=str,
         help="Configuration file path"
     )
+    parser.add_argument(
+        "--cache-config",
+        action="store_true",
+        help="Reuse a cached parse of the config file while it is unchanged (or set EDPM_CACHE_CONFIG=1)"
+    )
     parser.add_argument(
         "--log-level", "-l",
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
@@ -127,35 +147,22 @@ def server_main():
     logger.info("Starting EDPM Server")
     
     try:
-        # Load configuration
-        if args.config:
-            config = Config.from_file(args.config)
-        else:
-            config = Config.from_env()
-        
-        # Override config with command line arguments
-        if args.endpoint:
-            config.endpoint = args.endpoint
-        if args.web_port:
-            config.web_port = args.web_port
-        if args.disable_web:
-            config.web_enabled = False
+        # Load configuration, then override with command line arguments
+        config = load_config(args).overlay({
+            "zmq_endpoint": args.endpoint,
+            "ws_port": args.web_port,
+            "web_enabled": False if args.disable_web else None,
+            # Simulator flags only ever switch simulation on
+            "gpio_mode": "SIMULATOR" if args.simulator or args.gpio_simulator else None,
+            "i2c_simulator": True if args.simulator or args.i2c_simulator else None,
+            "i2s_simulator": True if args.simulator or args.i2s_simulator else None,
+            "rs485_simulator": True if args.simulator or args.rs485_simulator else None,
+        })
         
-        # Set simulator flags
-        if args.simulator:
-            config.gpio_simulator = True
-            config.i2c_simulator = True
-            config.i2s_simulator = True
-            config.rs485_simulator = True
-        else:
-            if args.gpio_simulator:
-                config.gpio_simulator = True
-            if args.i2c_simulator:
-                config.i2c_simulator = True
-            if args.i2s_simulator:
-                config.i2s_simulator = True
-            if args.rs485_simulator:
-                config.rs485_simulator = True
+        # Heavy imports are deferred until the arguments have parsed
+        import asyncio
+        import signal
+        from .core.server import EDPMServer
         
         # Create and start server
         server = EDPMServer(config)
@@ -164,57 +171,62 @@ def server_main():
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
-        def signal_handler(signum, frame):
-            logger.info(f"Received signal {signum}, shutting down...")
+        def signal_handler(signum):
+            logger.info("Received signal %s, shutting down...", signum)
             loop.create_task(server.stop())
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        # Handled on the loop itself (via its wakeup fd), not in signal context
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, signal_handler, signum)
         
         # Run server
-        logger.info(f"EDPM Server starting on {config.endpoint}")
+        logger.info("EDPM Server starting on %s", config.zmq_endpoint)
         if config.web_enabled:
-            logger.info(f"Web dashboard available at http://localhost:{config.web_port}")
+            logger.info("Web dashboard available at http://localhost:%s", config.ws_port)
         
         loop.run_until_complete(server.start())
         
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
-        logger.error(f"Server error: {e}")
+        logger.error("Server error: %s", e)
         sys.exit(1)
     finally:
         logger.info("EDPM Server stopped")
 
 
-def client_main():
-    """Main entry point for EDPM client"""
-    parser = create_base_parser()
-    parser.prog = "edpm-client"
-    parser.description = "EDPM Lite Client - Industrial IoT Edge Data Processing Client"
-    
-    # Client-specific arguments
-    parser.add_argument(
-        "--endpoint",
-        type=str,
-        help="EDPM server endpoint (default: from config or ipc:///tmp/edpm.ipc)"
-    )
-    parser.add_argument(
-        "--transport",
-        choices=["zmq", "websocket"],
-        default="zmq",
-        help="Transport protocol (default: zmq)"
-    )
-    parser.add_argument(
-        "--websocket-url",
-        type=str,
-        help="WebSocket server URL (default: ws://localhost:8080/ws)"
-    )
-    
-    # Command subparsers
-    subparsers = parser.add_subparsers(dest="command", help="Available commands")
-    
-    # GPIO commands
+def _auto_int(value: str) -> int:
+    """Parse an integer in any base Python accepts (0x40, 0o17, 0b101, 64)"""
+    return int(value, 0)
+
+
+# GPIO output levels
+_BIT_CHOICES = (0, 1)
+
+# Client options that consume the following argv token
+_CLIENT_VALUE_OPTIONS = frozenset({
+    "--config", "-c", "--log-level", "-l", "--log-file",
+    "--endpoint", "--transport", "--websocket-url",
+})
+
+
+def _peek_command(argv, value_options) -> Optional[str]:
+    """Return the first positional token of argv, or None if help comes first"""
+    skip = False
+    for token in argv:
+        if skip:
+            skip = False
+        elif token in ("-h", "--help"):
+            return None
+        elif token in value_options:
+            skip = True
+        elif not token.startswith("-"):
+            return token
+    return None
+
+
+def _build_gpio(subparsers):
+    """Register GPIO commands"""
     gpio_parser = subparsers.add_parser("gpio", help="GPIO commands")
     gpio_subparsers = gpio_parser.add_subparsers(dest="gpio_action", help="GPIO actions")
     
@@ -223,30 +235,34 @@ def client_main():
     
     gpio_write_parser = gpio_subparsers.add_parser("write", help="Write GPIO pin")
     gpio_write_parser.add_argument("pin", type=int, help="GPIO pin number")
-    gpio_write_parser.add_argument("value", type=int, choices=[0, 1], help="Pin value (0 or 1)")
+    gpio_write_parser.add_argument("value", type=int, choices=_BIT_CHOICES, help="Pin value (0 or 1)")
     
     gpio_pwm_parser = gpio_subparsers.add_parser("pwm", help="Set PWM on GPIO pin")
     gpio_pwm_parser.add_argument("pin", type=int, help="GPIO pin number")
     gpio_pwm_parser.add_argument("frequency", type=float, help="PWM frequency in Hz")
     gpio_pwm_parser.add_argument("duty_cycle", type=float, help="PWM duty cycle (0-100)")
-    
-    # I2C commands
+
+
+def _build_i2c(subparsers):
+    """Register I2C commands"""
     i2c_parser = subparsers.add_parser("i2c", help="I2C commands")
     i2c_subparsers = i2c_parser.add_subparsers(dest="i2c_action", help="I2C actions")
     
     i2c_scan_parser = i2c_subparsers.add_parser("scan", help="Scan I2C devices")
     
     i2c_read_parser = i2c_subparsers.add_parser("read", help="Read from I2C device")
-    i2c_read_parser.add_argument("address", type=lambda x: int(x, 0), help="I2C device address (hex or decimal)")
-    i2c_read_parser.add_argument("register", type=lambda x: int(x, 0), help="Register address")
+    i2c_read_parser.add_argument("address", type=_auto_int, help="I2C device address (hex or decimal)")
+    i2c_read_parser.add_argument("register", type=_auto_int, help="Register address")
     i2c_read_parser.add_argument("--count", type=int, default=1, help="Number of bytes to read")
     
     i2c_write_parser = i2c_subparsers.add_parser("write", help="Write to I2C device")
-    i2c_write_parser.add_argument("address", type=lambda x: int(x, 0), help="I2C device address (hex or decimal)")
-    i2c_write_parser.add_argument("register", type=lambda x: int(x, 0), help="Register address")
-    i2c_write_parser.add_argument("data", nargs="+", type=lambda x: int(x, 0), help="Data bytes to write")
-    
-    # I2S commands
+    i2c_write_parser.add_argument("address", type=_auto_int, help="I2C device address (hex or decimal)")
+    i2c_write_parser.add_argument("register", type=_auto_int, help="Register address")
+    i2c_write_parser.add_argument("data", nargs="+", type=_auto_int, help="Data bytes to write")
+
+
+def _build_i2s(subparsers):
+    """Register I2S audio commands"""
     i2s_parser = subparsers.add_parser("i2s", help="I2S audio commands")
     i2s_subparsers = i2s_parser.add_subparsers(dest="i2s_action", help="I2S actions")
     
@@ -257,8 +273,10 @@ def client_main():
     i2s_record_parser = i2s_subparsers.add_parser("record", help="Record audio")
     i2s_record_parser.add_argument("duration", type=float, help="Recording duration in seconds")
     i2s_record_parser.add_argument("--output", type=str, help="Output file path")
-    
-    # RS485 commands
+
+
+def _build_rs485(subparsers):
+    """Register RS485/Modbus and VFD commands"""
     rs485_parser = subparsers.add_parser("rs485", help="RS485/Modbus commands")
     rs485_subparsers = rs485_parser.add_subparsers(dest="rs485_action", help="RS485 actions")
     
@@ -283,9 +301,57 @@ def client_main():
     rs485_vfd_speed = rs485_vfd_subparsers.add_parser("speed", help="Set VFD speed")
     rs485_vfd_speed.add_argument("device_id", type=int, help="VFD device ID")
     rs485_vfd_speed.add_argument("speed", type=int, help="Speed percentage (0-100)")
+
+
+def _build_status(subparsers):
+    """Register status command"""
+    subparsers.add_parser("status", help="Get server status")
+
+
+# Subcommand tree builders, keyed on the command name
+CLIENT_BUILDERS = {
+    "gpio": _build_gpio,
+    "i2c": _build_i2c,
+    "i2s": _build_i2s,
+    "rs485": _build_rs485,
+    "status": _build_status,
+}
+
+
+def client_main():
+    """Main entry point for EDPM client"""
+    parser = create_base_parser()
+    parser.prog = "edpm-client"
+    parser.description = "EDPM Lite Client - Industrial IoT Edge Data Processing Client"
+    
+    # Client-specific arguments
+    parser.add_argument(
+        "--endpoint",
+        type=str,
+        help="EDPM server endpoint (default: from config or ipc:///tmp/edpm.ipc)"
+    )
+    parser.add_argument(
+        "--transport",
+        choices=["zmq", "websocket"],
+        default="zmq",
+        help="Transport protocol (default: zmq)"
+    )
+    parser.add_argument(
+        "--websocket-url",
+        type=str,
+        help="WebSocket server URL (default: ws://localhost:8080/ws)"
+    )
     
-    # Status command
-    status_parser = subparsers.add_parser("status", help="Get server status")
+    # Command subparsers; only the invoked command's tree is built
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+    
+    command = _peek_command(sys.argv[1:], _CLIENT_VALUE_OPTIONS)
+    if command in CLIENT_BUILDERS:
+        CLIENT_BUILDERS[command](subparsers)
+    else:
+        # Top-level help, no command or a typo: argparse needs every choice
+        for build in CLIENT_BUILDERS.values():
+            build(subparsers)
     
     args = parser.parse_args()
     
@@ -297,114 +363,127 @@ def client_main():
     logger = setup_logging(args.log_level, args.log_file)
     
     try:
-        # Load configuration
-        if args.config:
-            config = Config.from_file(args.config)
-        else:
-            config = Config.from_env()
-        
-        # Override config with command line arguments
-        if args.endpoint:
-            config.endpoint = args.endpoint
+        # Load configuration, then override with command line arguments
+        config = load_config(args).overlay({"zmq_endpoint": args.endpoint})
         if args.websocket_url:
             config.websocket_url = args.websocket_url
         
         # Execute command
+        import asyncio
         asyncio.run(execute_client_command(args, config, logger))
         
     except Exception as e:
-        logger.error(f"Client error: {e}")
+        logger.error("Client error: %s", e)
         sys.exit(1)
 
 
+# (command, action[, sub-action]) -> (client call, output template)
+CLIENT_COMMANDS = {
+    ("status",): (
+        lambda c, a: c.command("get_stats"),
+        "Server Status: {r}",
+    ),
+    ("gpio", "read"): (
+        lambda c, a: c.gpio_get(a.pin),
+        "GPIO Pin {a.pin}: {r}",
+    ),
+    ("gpio", "write"): (
+        lambda c, a: c.gpio_set(a.pin, a.value),
+        "GPIO Pin {a.pin} set to {a.value}: {r}",
+    ),
+    ("gpio", "pwm"): (
+        lambda c, a: c.command(
+            "gpio_pwm_start",
+            pin=a.pin,
+            frequency=a.frequency,
+            duty_cycle=a.duty_cycle
+        ),
+        "GPIO Pin {a.pin} PWM set: {r}",
+    ),
+    ("i2c", "scan"): (
+        lambda c, a: c.i2c_scan(),
+        "I2C Devices Found: {r}",
+    ),
+    ("i2c", "read"): (
+        lambda c, a: c.command(
+            "i2c_read",
+            address=a.address,
+            register=a.register,
+            length=a.count
+        ),
+        "I2C Read from 0x{a.address:02X}[0x{a.register:02X}]: {r}",
+    ),
+    ("i2c", "write"): (
+        lambda c, a: c.i2c_write(a.address, a.data, a.register),
+        "I2C Write to 0x{a.address:02X}[0x{a.register:02X}]: {r}",
+    ),
+    ("i2s", "tone"): (
+        lambda c, a: c.play_tone(a.frequency, a.duration),
+        "I2S Tone Generated: {r}",
+    ),
+    ("i2s", "record"): (
+        lambda c, a: c.command(
+            "record_audio",
+            duration=a.duration,
+            filename=a.output
+        ),
+        "I2S Recording: {r}",
+    ),
+    ("rs485", "scan"): (
+        lambda c, a: c.command("rs485_scan", start_id=a.start, end_id=a.end),
+        "RS485 Device Scan: {r}",
+    ),
+    ("rs485", "read"): (
+        lambda c, a: c.command(
+            "modbus_read",
+            device_id=a.device_id,
+            start_address=a.address,
+            count=a.count
+        ),
+        "RS485 Modbus Read: {r}",
+    ),
+    ("rs485", "vfd", "start"): (
+        lambda c, a: c.command("start_vfd", device_id=a.device_id),
+        "VFD Start: {r}",
+    ),
+    ("rs485", "vfd", "stop"): (
+        lambda c, a: c.command("stop_vfd", device_id=a.device_id),
+        "VFD Stop: {r}",
+    ),
+    ("rs485", "vfd", "speed"): (
+        lambda c, a: c.command("set_vfd_speed", device_id=a.device_id, speed=a.speed),
+        "VFD Speed Set: {r}",
+    ),
+}
+
+
+def _command_key(args) -> tuple:
+    """Collect the command and nested *_action values parsed from argv"""
+    key = [args.command]
+    action = getattr(args, f"{args.command}_action", None)
+    while action is not None:
+        key.append(action)
+        action = getattr(args, f"{action}_action", None)
+    return tuple(key)
+
+
 async def execute_client_command(args, config: Config, logger):
     """Execute client command"""
+    from .core.client import EDPMClient
+    
+    key = _command_key(args)
+    if key not in CLIENT_COMMANDS:
+        logger.error("Incomplete command: %s", " ".join(key))
+        return
+    call, template = CLIENT_COMMANDS[key]
+    
     # Create client
-    transport = "websocket" if args.transport == "websocket" else "zmq"
-    client = EDPMClient(config, transport=transport)
+    client = EDPMClient(config.zmq_endpoint, config, use_zmq=args.transport != "websocket")
     
     try:
         await client.connect()
-        
-        # Execute command based on arguments
-        if args.command == "status":
-            result = await client.send_command("status", {})
-            print(f"Server Status: {result}")
-        
-        elif args.command == "gpio":
-            if args.gpio_action == "read":
-                result = await client.gpio_read(args.pin)
-                print(f"GPIO Pin {args.pin}: {result}")
-            elif args.gpio_action == "write":
-                result = await client.gpio_write(args.pin, args.value)
-                print(f"GPIO Pin {args.pin} set to {args.value}: {result}")
-            elif args.gpio_action == "pwm":
-                result = await client.gpio_pwm(args.pin, args.frequency, args.duty_cycle)
-                print(f"GPIO Pin {args.pin} PWM set: {result}")
-        
-        elif args.command == "i2c":
-            if args.i2c_action == "scan":
-                result = await client.i2c_scan()
-                print(f"I2C Devices Found: {result}")
-            elif args.i2c_action == "read":
-                result = await client.i2c_read(args.address, args.register, args.count)
-                print(f"I2C Read from 0x{args.address:02X}[0x{args.register:02X}]: {result}")
-            elif args.i2c_action == "write":
-                result = await client.i2c_write(args.address, args.register, args.data)
-                print(f"I2C Write to 0x{args.address:02X}[0x{args.register:02X}]: {result}")
-        
-        elif args.command == "i2s":
-            if args.i2s_action == "tone":
-                result = await client.send_command("i2s", {
-                    "action": "generate_tone",
-                    "frequency": args.frequency,
-                    "duration": args.duration
-                })
-                print(f"I2S Tone Generated: {result}")
-            elif args.i2s_action == "record":
-                result = await client.send_command("i2s", {
-                    "action": "record_audio",
-                    "duration": args.duration,
-                    "output_path": args.output
-                })
-                print(f"I2S Recording: {result}")
-        
-        elif args.command == "rs485":
-            if args.rs485_action == "scan":
-                result = await client.send_command("rs485", {
-                    "action": "scan_devices",
-                    "start_id": args.start,
-                    "end_id": args.end
-                })
-                print(f"RS485 Device Scan: {result}")
-            elif args.rs485_action == "read":
-                result = await client.send_command("rs485", {
-                    "action": "modbus_read",
-                    "device_id": args.device_id,
-                    "start_address": args.address,
-                    "count": args.count
-                })
-                print(f"RS485 Modbus Read: {result}")
-            elif args.rs485_action == "vfd":
-                if args.vfd_action == "start":
-                    result = await client.send_command("rs485", {
-                        "action": "start_vfd",
-                        "device_id": args.device_id
-                    })
-                    print(f"VFD Start: {result}")
-                elif args.vfd_action == "stop":
-                    result = await client.send_command("rs485", {
-                        "action": "stop_vfd",
-                        "device_id": args.device_id
-                    })
-                    print(f"VFD Stop: {result}")
-                elif args.vfd_action == "speed":
-                    result = await client.send_command("rs485", {
-                        "action": "set_vfd_speed",
-                        "device_id": args.device_id,
-                        "speed": args.speed
-                    })
-                    print(f"VFD Speed Set: {result}")
+        result = await call(client, args)
+        print(template.format(a=args, r=result))
         
     finally:
         await client.disconnect()
@@ -446,17 +525,16 @@ def dashboard_main():
     logger.info("Starting EDPM Dashboard Server")
     
     try:
-        # Load configuration
-        if args.config:
-            config = Config.from_file(args.config)
-        else:
-            config = Config.from_env()
+        # Load configuration, then override with command line arguments
+        config = load_config(args).overlay({
+            "ws_port": args.port,
+            "zmq_endpoint": args.edpm_endpoint,
+        })
         
-        # Override config with command line arguments
-        if args.port:
-            config.web_port = args.port
-        if args.edpm_endpoint:
-            config.endpoint = args.edpm_endpoint
+        # Heavy imports are deferred until the arguments have parsed
+        import asyncio
+        import signal
+        from .web.dashboard import DashboardServer
         
         # Create dashboard server
         dashboard = DashboardServer(config)
@@ -465,22 +543,23 @@ def dashboard_main():
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         
-        def signal_handler(signum, frame):
-            logger.info(f"Received signal {signum}, shutting down dashboard...")
+        def signal_handler(signum):
+            logger.info("Received signal %s, shutting down dashboard...", signum)
             loop.create_task(dashboard.stop())
         
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
+        # Handled on the loop itself (via its wakeup fd), not in signal context
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, signal_handler, signum)
         
         # Run dashboard
-        logger.info(f"EDPM Dashboard starting on http://{args.host}:{config.web_port}")
+        logger.info("EDPM Dashboard starting on http://%s:%s", args.host, config.ws_port)
         
-        loop.run_until_complete(dashboard.start(host=args.host, port=config.web_port))
+        loop.run_until_complete(dashboard.start(host=args.host, port=config.ws_port))
         
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
-        logger.error(f"Dashboard error: {e}")
+        logger.error("Dashboard error: %s", e)
         sys.exit(1)
     finally:
         logger.info("EDPM Dashboard stopped")
@@ -4,8 +4,21 @@ Core functionality for EDPM framework including messaging, server, and client.
 """
 
 from .message import Message, MessageType
-from .client import EDPMClient
-from .server import EDPMServer
 from .config import Config
 
+# Client and server import zmq and sqlite3; load them on first access
+_LAZY_IMPORTS = {
+    "EDPMClient": ".client",
+    "EDPMServer": ".server",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = ["Message", "MessageType", "EDPMClient", "EDPMServer", "Config"]
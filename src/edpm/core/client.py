@@ -3,18 +3,25 @@ EDPM Client Module
 Universal client for EDPM communication supporting ZeroMQ and WebSocket transports.
 """
 
+import asyncio
+import itertools
 import json
 import time
 import os
-import sqlite3
 import logging
+import threading
+import uuid
+import atexit
+import weakref
+from collections import deque
 from typing import Optional, Dict, Any, Callable, Union
-from .message import Message, MessageType
+from .message import Message, MessageType, HAS_MSGPACK, is_json_payload
 from .config import Config
 
 # Optional dependencies
 try:
     import zmq
+    import zmq.asyncio
     HAS_ZMQ = True
 except ImportError:
     HAS_ZMQ = False
@@ -29,6 +36,35 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched, sent and marked per transaction when syncing offline messages
+SYNC_BATCH_SIZE = 256
+
+# Offline inserts are buffered and written in one transaction once this many are
+# pending, or after STORE_FLUSH_INTERVAL seconds, whichever comes first
+STORE_FLUSH_SIZE = 64
+STORE_FLUSH_INTERVAL = 0.1
+
+INSERT_MESSAGE_SQL = 'INSERT INTO messages (timestamp, type, source, data) VALUES (?, ?, ?, ?)'
+
+# Minimum seconds between WAL truncations done by the flush path
+WAL_CHECKPOINT_INTERVAL = 5.0
+
+# Source tag on every message this client creates
+CLIENT_SOURCE = "client"
+
+# Seconds to wait for the server's reply to one request
+RESPONSE_TIMEOUT = 5.0
+
+# Queue depth per direction; sized for an offline sync burst (libzmq default is 1000)
+ZMQ_HWM = 10000
+
+
+def _flush_at_exit(client_ref):
+    """atexit hook: write out a client's pending offline messages"""
+    client = client_ref()
+    if client is not None:
+        client._flush_pending()
+
 
 class EDPMClient:
     """
@@ -51,6 +87,7 @@ class EDPMClient:
         self.config = config or Config.from_env()
         self.endpoint = endpoint or self.config.zmq_endpoint
         self.use_zmq = use_zmq and HAS_ZMQ
+        self.use_msgpack = self.config.wire_format == "msgpack" and HAS_MSGPACK
         
         # Initialize transport
         self.zmq_context = None
@@ -58,19 +95,47 @@ class EDPMClient:
         self.ws_connection = None
         self.connected = False
         
+        # In-flight ZMQ requests keyed by message id, resolved by the receive loop
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._recv_task: Optional[asyncio.Task] = None
+        # Request ids are "<random prefix>-<counter>", unique across processes so replayed
+        # offline messages never collide with each other or with live requests
+        self._id_prefix = uuid.uuid4().hex[:12]
+        self._ids = itertools.count(1)
+        self._ws_lock: Optional[asyncio.Lock] = None
+        
         # Local storage for offline capability
         self.db_path = self.config.db_path
-        self._init_storage()
+        self._db_conn = None
+        self._db_lock = threading.Lock()
+        self._pending_inserts = deque()
+        self._flush_timer = None
+        self._last_checkpoint = time.monotonic()
+        # The flush timer is a daemon thread; don't lose its batch at interpreter exit
+        atexit.register(_flush_at_exit, weakref.ref(self))
         
-        logger.info(f"EDPM Client initialized with endpoint: {self.endpoint}")
+        logger.info("EDPM Client initialized with endpoint: %s", self.endpoint)
+    
+    def _storage(self):
+        """Return the storage connection, opening it on first use"""
+        if self._db_conn is None:
+            self._init_storage()
+        return self._db_conn
     
     def _init_storage(self):
         """Initialize local SQLite storage for message buffering"""
+        # Imported here so clients that never go offline don't pay for sqlite3
+        import sqlite3
+        
         try:
             # Create directory if needed
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            conn = sqlite3.connect(self.db_path)
+            # One connection for the client's lifetime, shared with the flush timer
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA temp_store=MEMORY')
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS messages (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -78,16 +143,31 @@ class EDPMClient:
                     type TEXT,
                     source TEXT,
                     data TEXT,
-                    sent BOOLEAN DEFAULT FALSE
+                    sent INTEGER NOT NULL DEFAULT 0
                 )
             ''')
-            conn.commit()
-            conn.close()
+            try:
+                # Partial index: only the unsent backlog is indexed, so it stays small
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_unsent ON messages(id) WHERE sent = 0')
+            except sqlite3.OperationalError as e:
+                logger.warning("Could not index offline messages: %s", e)
+            self._db_conn = conn
             
         except Exception as e:
-            logger.warning(f"Failed to initialize storage: {e}")
+            logger.warning("Failed to initialize storage: %s", e)
+    
+    def _executemany(self, sql: str, rows):
+        """Run a statement for many rows inside one explicit transaction"""
+        conn = self._storage()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(sql, rows)
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
     
-    def connect(self) -> bool:
+    async def connect(self) -> bool:
         """
         Connect to EDPM server using preferred transport
         
@@ -95,60 +175,72 @@ class EDPMClient:
             bool: True if connection successful, False otherwise
         """
         if self.use_zmq and HAS_ZMQ:
-            return self._connect_zmq()
+            return await self._connect_zmq()
         elif HAS_WS:
-            return self._connect_websocket()
+            return await self._connect_websocket()
         else:
             logger.error("No supported transport available (install pyzmq or websocket-client)")
             return False
     
-    def _connect_zmq(self) -> bool:
+    async def _connect_zmq(self) -> bool:
         """Connect using ZeroMQ transport"""
         try:
-            self.zmq_context = zmq.Context()
-            self.zmq_socket = self.zmq_context.socket(zmq.REQ)
-            self.zmq_socket.setsockopt(zmq.RCVTIMEO, 5000)  # 5s timeout
-            self.zmq_socket.setsockopt(zmq.SNDTIMEO, 5000)
+            # DEALER instead of REQ: many requests may be in flight at once, replies are
+            # matched back to their request by message id
+            self.zmq_context = zmq.asyncio.Context.instance()
+            self.zmq_socket = self.zmq_context.socket(zmq.DEALER)
+            self.zmq_socket.setsockopt(zmq.LINGER, 0)
+            self.zmq_socket.setsockopt(zmq.SNDHWM, ZMQ_HWM)
+            self.zmq_socket.setsockopt(zmq.RCVHWM, ZMQ_HWM)
+            # Only queue to a completed connection, so a dead endpoint times out
+            # instead of silently accumulating requests
+            self.zmq_socket.setsockopt(zmq.IMMEDIATE, 1)
             self.zmq_socket.connect(self.endpoint)
+            self._recv_task = asyncio.create_task(self._zmq_recv_loop())
             
-            # Test connection
-            test_msg = Message.create_log("info", "Connection test", source="client")
-            response = self._send_zmq(test_msg)
-            
-            self.connected = response is not None
-            logger.info(f"ZMQ connection {'successful' if self.connected else 'failed'}")
-            return self.connected
+            # ZMQ connects in the background; liveness is confirmed by the first reply
+            self.connected = True
+            logger.info("ZMQ connection successful")
+            return True
             
         except Exception as e:
-            logger.error(f"ZMQ connection failed: {e}")
+            logger.error("ZMQ connection failed: %s", e)
             return False
     
-    def _connect_websocket(self) -> bool:
+    async def _connect_websocket(self) -> bool:
         """Connect using WebSocket transport"""
         try:
             ws_url = f"ws://localhost:{self.config.ws_port}/ws"
-            self.ws_connection = websocket.create_connection(ws_url, timeout=5)
+            self.ws_connection = await asyncio.to_thread(websocket.create_connection, ws_url, timeout=5)
+            self._ws_lock = asyncio.Lock()
             self.connected = True
             logger.info("WebSocket connection successful")
             return True
             
         except Exception as e:
-            logger.error(f"WebSocket connection failed: {e}")
+            logger.error("WebSocket connection failed: %s", e)
             return False
     
-    def disconnect(self):
+    async def disconnect(self):
         """Disconnect from server and cleanup resources"""
+        if self._recv_task:
+            self._recv_task.cancel()
+            self._recv_task = None
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
         if self.zmq_socket:
-            self.zmq_socket.close()
-        if self.zmq_context:
-            self.zmq_context.term()
+            # The context is the process-wide shared instance, so it is left running
+            self.zmq_socket.close(linger=0)
         if self.ws_connection:
             self.ws_connection.close()
         
+        self._flush_pending()
+        
         self.connected = False
         logger.info("EDPM Client disconnected")
     
-    def send(self, message: Message) -> Optional[Message]:
+    async def send(self, message: Message) -> Optional[Message]:
         """
         Send message to server
         
@@ -164,53 +256,124 @@ class EDPMClient:
             return None
         
         try:
-            if self.use_zmq and self.zmq_socket:
-                return self._send_zmq(message)
-            elif self.ws_connection:
-                return self._send_websocket(message)
+            response = await self._transmit(message)
+            if response is None and not self.connected:
+                # Server went quiet while we waited; keep the message for sync
+                self._store_message(message)
+            return response
         except Exception as e:
-            logger.error(f"Send failed: {e}")
+            logger.error("Send failed: %s", e)
             self._store_message(message)
         
         return None
     
-    def _send_zmq(self, message: Message) -> Optional[Message]:
-        """Send message via ZeroMQ"""
+    async def _transmit(self, message: Message) -> Optional[Message]:
+        """Send message over the active transport without offline fallback"""
+        if self.use_zmq and self.zmq_socket:
+            return await self._send_zmq(message)
+        elif self.ws_connection:
+            return await self._send_websocket(message)
+        return None
+    
+    async def _send_zmq(self, message: Message) -> Optional[Message]:
+        """Send message via ZeroMQ and wait for its reply"""
+        # Always a fresh id: a stored message may carry one from an earlier process
+        message.id = f"{self._id_prefix}-{next(self._ids)}"
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message.id] = future
+        
         try:
-            self.zmq_socket.send_string(message.to_json())
-            response_str = self.zmq_socket.recv_string()
-            return Message.from_json(response_str)
-        except zmq.Again:
-            logger.warning("ZMQ send timeout")
+            # One deadline covers the send too: with IMMEDIATE it waits for a live peer
+            return await asyncio.wait_for(self._roundtrip(message, future), timeout=RESPONSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("ZMQ send timeout, marking connection as down")
+            self.connected = False
             return None
         except Exception as e:
-            logger.error(f"ZMQ send error: {e}")
+            logger.error("ZMQ send error: %s", e)
             return None
-    
-    def _send_websocket(self, message: Message) -> Optional[Message]:
+        finally:
+            self._pending.pop(message.id, None)
+    
+    async def _roundtrip(self, message: Message, future: asyncio.Future) -> Message:
+        """Send one request and wait for the receive loop to resolve its reply"""
+        # Empty delimiter frame so the server's REP socket sees a regular request
+        payload = message.to_msgpack() if self.use_msgpack else message.to_bytes()
+        await self.zmq_socket.send_multipart([b"", payload], copy=False)
+        return await future
+    
+    async def _zmq_recv_loop(self):
+        """Receive replies and resolve the matching pending requests"""
+        while True:
+            try:
+                frames = await self.zmq_socket.recv_multipart(copy=False)
+                buf = frames[-1].buffer
+                response = Message.from_bytes(buf) if is_json_payload(buf) else Message.from_msgpack(buf)
+                if response.id is not None:
+                    # Unknown ids are late replies to requests that already timed out
+                    future = self._pending.pop(response.id, None)
+                elif self._pending:
+                    # Server without id echo: a REP socket answers strictly in order
+                    future = self._pending.pop(next(iter(self._pending)))
+                else:
+                    future = None
+                if future is not None and not future.done():
+                    future.set_result(response)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("ZMQ receive error: %s", e)
+    
+    async def _send_websocket(self, message: Message) -> Optional[Message]:
         """Send message via WebSocket"""
         try:
-            self.ws_connection.send(message.to_json())
-            response_str = self.ws_connection.recv()
-            return Message.from_json(response_str)
+            # websocket-client is blocking; one request/reply pair at a time off the loop
+            async with self._ws_lock:
+                return await asyncio.to_thread(self._ws_request, message.to_bytes())
         except Exception as e:
-            logger.error(f"WebSocket send error: {e}")
+            logger.error("WebSocket send error: %s", e)
             return None
     
+    def _ws_request(self, payload: bytes) -> Message:
+        """Blocking WebSocket request/reply"""
+        self.ws_connection.send_binary(payload)
+        return Message.from_bytes(self.ws_connection.recv())
+    
     def _store_message(self, message: Message):
-        """Store message in local database for offline capability"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            conn.execute(
-                'INSERT INTO messages (timestamp, type, source, data) VALUES (?, ?, ?, ?)',
-                (message.timestamp, message.type, message.source, message.to_json())
+        """Buffer message for the local database (offline capability)"""
+        with self._db_lock:
+            self._pending_inserts.append(
+                (message.timestamp_or_now, message.type, message.source, message.to_json())
             )
-            conn.commit()
-            conn.close()
-        except Exception as e:
-            logger.error(f"Failed to store message: {e}")
-    
-    def sync_offline_messages(self) -> int:
+            if len(self._pending_inserts) < STORE_FLUSH_SIZE:
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(STORE_FLUSH_INTERVAL, self._flush_pending)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self._flush_pending()
+    
+    def _flush_pending(self):
+        """Write buffered offline messages in a single transaction"""
+        with self._db_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending_inserts:
+                return
+            batch = list(self._pending_inserts)
+            self._pending_inserts.clear()
+            try:
+                self._executemany(INSERT_MESSAGE_SQL, batch)
+                now = time.monotonic()
+                if now - self._last_checkpoint >= WAL_CHECKPOINT_INTERVAL:
+                    # Fold the WAL back into the database and reset it to zero length
+                    self._db_conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                    self._last_checkpoint = now
+            except Exception as e:
+                logger.error("Failed to store %d messages: %s", len(batch), e)
+    
+    async def sync_offline_messages(self) -> int:
         """
         Sync stored offline messages to server
         
@@ -220,107 +383,175 @@ class EDPMClient:
         if not self.connected:
             return 0
         
+        self._flush_pending()
+        
         sent_count = 0
+        # Checked once per sync rather than on every failed row
+        log_errors = logger.isEnabledFor(logging.ERROR)
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.execute('SELECT id, data FROM messages WHERE sent = FALSE')
+            with self._db_lock:
+                conn = self._storage()
+            last_id = 0
             
-            for row in cursor.fetchall():
-                msg_id, msg_data = row
-                try:
-                    message = Message.from_json(msg_data)
-                    if self.send(message):
-                        # Mark as sent
-                        conn.execute('UPDATE messages SET sent = TRUE WHERE id = ?', (msg_id,))
-                        sent_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to sync message {msg_id}: {e}")
+            # Walk the backlog in id order, one batch and one transaction at a time
+            while True:
+                with self._db_lock:
+                    rows = conn.execute(
+                        'SELECT id, data FROM messages WHERE sent = 0 AND id > ? ORDER BY id LIMIT ?',
+                        (last_id, SYNC_BATCH_SIZE)
+                    ).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                
+                # All sends of a batch are in flight together
+                results = await asyncio.gather(
+                    *(self._replay(msg_data) for _, msg_data in rows), return_exceptions=True
+                )
+                
+                sent_ids = []
+                for (msg_id, _), result in zip(rows, results):
+                    if isinstance(result, Exception):
+                        if log_errors:
+                            logger.error("Failed to sync message %s: %s", msg_id, result)
+                    elif result:
+                        sent_ids.append((msg_id,))
+                
+                with self._db_lock:
+                    self._executemany('UPDATE messages SET sent = 1 WHERE id = ?', sent_ids)
+                sent_count += len(sent_ids)
+                
+                # Server gone: stop instead of waiting out RESPONSE_TIMEOUT on every later batch
+                if not sent_ids or not self.connected:
+                    logger.warning("Offline sync stopped early; remaining messages stay stored")
+                    break
             
-            conn.commit()
-            conn.close()
+            # Sent rows are never read again
+            with self._db_lock:
+                conn.execute('DELETE FROM messages WHERE sent = 1 AND id <= ?', (last_id,))
             
         except Exception as e:
-            logger.error(f"Failed to sync offline messages: {e}")
+            logger.error("Failed to sync offline messages: %s", e)
         
-        logger.info(f"Synced {sent_count} offline messages")
+        if sent_count:
+            logger.info("Synced %d offline messages", sent_count)
         return sent_count
     
+    async def _replay(self, msg_data: str) -> Optional[Message]:
+        """Resend one stored message (bypasses send() so failures aren't re-buffered)"""
+        return await self._transmit(Message.from_json(msg_data))
+    
     # Convenience methods for common operations
     
-    def log(self, level: str, message: str, **metadata) -> Optional[Message]:
+    async def log(self, level: str, message: str, **metadata) -> Optional[Message]:
         """Send log message"""
-        msg = Message.create_log(level, message, source="client", **metadata)
-        return self.send(msg)
+        msg = Message.create_log(level, message, CLIENT_SOURCE, **metadata)
+        return await self.send(msg)
     
-    def command(self, action: str, **params) -> Optional[Message]:
+    async def command(self, action: str, **params) -> Optional[Message]:
         """Send command message"""
-        msg = Message.create_command(action, source="client", **params)
-        return self.send(msg)
+        msg = Message.create_command(action, CLIENT_SOURCE, **params)
+        return await self.send(msg)
     
-    def event(self, event_type: str, **data) -> Optional[Message]:
+    async def event(self, event_type: str, **data) -> Optional[Message]:
         """Send event message"""
-        msg = Message.create_event(event_type, source="client", **data)
-        return self.send(msg)
+        msg = Message.create_event(event_type, CLIENT_SOURCE, **data)
+        return await self.send(msg)
     
     # GPIO convenience methods
     
-    def gpio_set(self, pin: int, value: int) -> Optional[Message]:
+    async def gpio_set(self, pin: int, value: int) -> Optional[Message]:
         """Set GPIO pin value"""
-        return self.command("gpio_set", pin=pin, value=value)
+        return await self.command("gpio_set", pin=pin, value=value)
     
-    def gpio_get(self, pin: int) -> Optional[Message]:
+    async def gpio_get(self, pin: int) -> Optional[Message]:
         """Get GPIO pin value"""
-        return self.command("gpio_get", pin=pin)
+        return await self.command("gpio_get", pin=pin)
     
-    def gpio_toggle(self, pin: int) -> Optional[Message]:
+    async def gpio_toggle(self, pin: int) -> Optional[Message]:
         """Toggle GPIO pin"""
-        return self.command("gpio_toggle", pin=pin)
+        return await self.command("gpio_toggle", pin=pin)
     
     # I2C convenience methods
     
-    def i2c_read(self, address: int, register: int = None) -> Optional[Message]:
+    async def i2c_read(self, address: int, register: int = None) -> Optional[Message]:
         """Read from I2C device"""
         params = {"address": address}
         if register is not None:
             params["register"] = register
-        return self.command("i2c_read", **params)
+        return await self.command("i2c_read", **params)
     
-    def i2c_write(self, address: int, data: Union[int, bytes], register: int = None) -> Optional[Message]:
+    async def i2c_write(self, address: int, data: Union[int, bytes], register: int = None) -> Optional[Message]:
         """Write to I2C device"""
         params = {"address": address, "data": data}
         if register is not None:
             params["register"] = register
-        return self.command("i2c_write", **params)
+        return await self.command("i2c_write", **params)
     
-    def i2c_scan(self) -> Optional[Message]:
+    async def i2c_scan(self) -> Optional[Message]:
         """Scan I2C bus for devices"""
-        return self.command("i2c_scan")
+        return await self.command("i2c_scan")
+    
+    async def i2c_scan_parallel(self, chunks: int = 8) -> Dict[str, Any]:
+        """
+        Scan the I2C bus as several range scans sent at once
+        
+        No faster than i2c_scan: the server runs commands for one bus under a single
+        lock, so the chunks still execute one after another, at one round trip each.
+        """
+        return await self._scan_parallel("i2c_scan", "start", "end", 0x03, 0x77, chunks)
     
     # Audio convenience methods
     
-    def play_tone(self, frequency: float, duration: float = 1.0) -> Optional[Message]:
+    async def play_tone(self, frequency: float, duration: float = 1.0) -> Optional[Message]:
         """Play audio tone"""
-        return self.command("play_tone", frequency=frequency, duration=duration)
+        return await self.command("play_tone", frequency=frequency, duration=duration)
     
-    def record_audio(self, duration: float = 5.0) -> Optional[Message]:
+    async def record_audio(self, duration: float = 5.0) -> Optional[Message]:
         """Record audio"""
-        return self.command("record_audio", duration=duration)
+        return await self.command("record_audio", duration=duration)
     
     # RS485/Modbus convenience methods
     
-    def modbus_read(self, device_id: int, register: int, count: int = 1) -> Optional[Message]:
+    async def modbus_read(self, device_id: int, register: int, count: int = 1) -> Optional[Message]:
         """Read Modbus registers"""
-        return self.command("modbus_read", device_id=device_id, register=register, count=count)
+        return await self.command("modbus_read", device_id=device_id, register=register, count=count)
     
-    def modbus_write(self, device_id: int, register: int, value: int) -> Optional[Message]:
+    async def modbus_write(self, device_id: int, register: int, value: int) -> Optional[Message]:
         """Write Modbus register"""
-        return self.command("modbus_write", device_id=device_id, register=register, value=value)
-    
-    def __enter__(self):
-        """Context manager entry"""
-        self.connect()
+        return await self.command("modbus_write", device_id=device_id, register=register, value=value)
+    
+    async def rs485_scan_parallel(self, start: int = 1, end: int = 10, workers: int = 4) -> Dict[str, Any]:
+        """Scan Modbus device ids as several range scans sent at once (see i2c_scan_parallel)"""
+        return await self._scan_parallel("rs485_scan", "start_id", "end_id", start, end, workers)
+    
+    async def _scan_parallel(self, action: str, start_key: str, end_key: str,
+                             first: int, last: int, chunks: int) -> Dict[str, Any]:
+        """Split first..last into chunks, send one scan per chunk and merge the devices found"""
+        step = -(-(last - first + 1) // max(1, chunks))
+        ranges = [(lo, min(lo + step - 1, last)) for lo in range(first, last + 1, step)]
+        responses = await asyncio.gather(
+            *(self.command(action, **{start_key: lo, end_key: hi}) for lo, hi in ranges)
+        )
+        
+        devices = []
+        errors = []
+        for response in responses:
+            if response is None or response.data.get("status") != "ok":
+                errors.append(response.data.get("error") if response else "no response")
+            else:
+                devices.extend(response.data.get("result", {}).get("devices", []))
+        
+        result = {'devices_found': len(devices), 'devices': devices}
+        if errors:
+            result['errors'] = errors
+        return result
+    
+    async def __aenter__(self):
+        """Async context manager entry"""
+        await self.connect()
         return self
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.disconnect()
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.disconnect()
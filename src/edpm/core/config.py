@@ -5,9 +5,30 @@ Centralized configuration management for EDPM framework.
 
 import os
 import json
-from dataclasses import dataclass
+import functools
+import hashlib
+import pickle
+import tempfile
+from dataclasses import dataclass, fields
+from types import MappingProxyType
 from typing import Dict, Any, Optional
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Environment variables read by from_env(); part of the from_file_cached() key
+ENV_KEYS = (
+    "EDPM_ENDPOINT", "EDPM_PORT", "EDPM_DB", "EDPM_MAX_BUFFER", "EDPM_DEBUG", "EDPM_WIRE_FORMAT",
+    "GPIO_MODE", "SIMULATE_SENSORS", "I2C_SIMULATOR", "I2S_SIMULATOR",
+    "RS485_SIMULATOR", "WEB_ENABLED", "STATIC_PATH", "DASHBOARD_PATH", "LOG_LEVEL",
+)
+
+GPIO_MODES = frozenset({"SIMULATOR", "BCM", "BOARD"})
+WIRE_FORMATS = frozenset({"json", "msgpack"})
+
 
 @dataclass
 class Config:
@@ -24,6 +45,7 @@ class Config:
     db_path: str = "/dev/shm/edpm.db"
     max_buffer: int = 10000
     debug: bool = False
+    wire_format: str = "json"  # json, msgpack (client request encoding)
     
     # GPIO settings
     gpio_mode: str = "SIMULATOR"  # SIMULATOR, BCM, BOARD
@@ -46,26 +68,7 @@ class Config:
     @classmethod
     def from_env(cls) -> 'Config':
         """Create configuration from environment variables"""
-        return cls(
-            zmq_endpoint=os.getenv("EDPM_ENDPOINT", cls.zmq_endpoint),
-            ws_port=int(os.getenv("EDPM_PORT", str(cls.ws_port))),
-            db_path=os.getenv("EDPM_DB", cls.db_path),
-            max_buffer=int(os.getenv("EDPM_MAX_BUFFER", str(cls.max_buffer))),
-            debug=os.getenv("EDPM_DEBUG", "false").lower() == "true",
-            
-            gpio_mode=os.getenv("GPIO_MODE", cls.gpio_mode),
-            
-            simulate_sensors=os.getenv("SIMULATE_SENSORS", "true").lower() == "true",
-            i2c_simulator=os.getenv("I2C_SIMULATOR", "true").lower() == "true", 
-            i2s_simulator=os.getenv("I2S_SIMULATOR", "true").lower() == "true",
-            rs485_simulator=os.getenv("RS485_SIMULATOR", "true").lower() == "true",
-            
-            web_enabled=os.getenv("WEB_ENABLED", "true").lower() == "true",
-            static_path=os.getenv("STATIC_PATH", cls.static_path),
-            dashboard_path=os.getenv("DASHBOARD_PATH", cls.dashboard_path),
-            
-            log_level=os.getenv("LOG_LEVEL", cls.log_level),
-        )
+        return cls(**_env_settings())
     
     @classmethod
     def from_file(cls, config_path: str) -> 'Config':
@@ -87,6 +90,52 @@ class Config:
         except (FileNotFoundError, json.JSONDecodeError) as e:
             raise ValueError(f"Error loading config file {config_path}: {e}")
     
+    @classmethod
+    def from_file_cached(cls, config_path: str) -> 'Config':
+        """Load configuration from JSON file, reusing a pickled parse while the file is unchanged"""
+        path = os.path.abspath(config_path)
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            raise ValueError(f"Error loading config file {config_path}: {e}")
+        
+        # The result also depends on the environment, so it is part of the stamp
+        stamp = (st.st_mtime_ns, st.st_size, tuple(os.environ.get(k) for k in ENV_KEYS))
+        digest = hashlib.sha1(path.encode()).hexdigest()[:16]
+        cache_path = os.path.join(tempfile.gettempdir(), f"edpm-config-{os.getuid()}-{digest}.pkl")
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                # Only trust a cache file this user wrote
+                if os.fstat(f.fileno()).st_uid == os.getuid():
+                    cached_stamp, config = pickle.load(f)
+                    if cached_stamp == stamp and isinstance(config, cls):
+                        return config
+        except Exception:
+            pass
+        
+        config = cls.from_file(config_path)
+        try:
+            tmp_path = f"{cache_path}.{os.getpid()}"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((stamp, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+        
+        return config
+    
+    def overlay(self, overrides: Dict[str, Any]) -> 'Config':
+        """Apply command line overrides in place; None means not given"""
+        names = {f.name for f in fields(self)}
+        for key, value in overrides.items():
+            if value is None:
+                continue
+            if key not in names:
+                raise ValueError(f"Unknown config setting: {key}")
+            setattr(self, key, value)
+        return self
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary"""
         return {
@@ -96,6 +145,7 @@ class Config:
                 "db_path": self.db_path,
                 "max_buffer": self.max_buffer,
                 "debug": self.debug,
+                "wire_format": self.wire_format,
             },
             "gpio": {
                 "mode": self.gpio_mode,
@@ -119,6 +169,11 @@ class Config:
     
     def save_to_file(self, config_path: str):
         """Save configuration to JSON file"""
+        if HAS_ORJSON:
+            # One C-level encode; json.dump with indent falls back to the pure-Python encoder
+            with open(config_path, 'wb') as f:
+                f.write(orjson.dumps(self.to_dict(), option=orjson.OPT_INDENT_2))
+            return
         with open(config_path, 'w') as f:
             json.dump(self.to_dict(), f, indent=2)
     
@@ -142,16 +197,50 @@ class Config:
         """Validate configuration settings"""
         errors = []
         
-        if self.ws_port < 1 or self.ws_port > 65535:
+        # isinstance guards report a mistyped number with the other errors instead of raising TypeError
+        if not (isinstance(self.ws_port, int) and 1 <= self.ws_port <= 65535):
             errors.append(f"Invalid port: {self.ws_port}")
         
-        if self.max_buffer < 100:
+        if not (isinstance(self.max_buffer, int) and self.max_buffer >= 100):
             errors.append(f"Buffer too small: {self.max_buffer}")
         
-        if self.gpio_mode not in ["SIMULATOR", "BCM", "BOARD"]:
+        if self.gpio_mode not in GPIO_MODES:
             errors.append(f"Invalid GPIO mode: {self.gpio_mode}")
         
+        if self.wire_format not in WIRE_FORMATS:
+            errors.append(f"Invalid wire format: {self.wire_format}")
+        
         if errors:
             raise ValueError(f"Configuration validation failed: {', '.join(errors)}")
         
         return True
+
+
+@functools.lru_cache(maxsize=1)
+def _env_settings() -> MappingProxyType:
+    """
+    Read and parse the environment once per process
+    
+    Call _env_settings.cache_clear() after changing os.environ at runtime.
+    """
+    return MappingProxyType(dict(
+        zmq_endpoint=os.getenv("EDPM_ENDPOINT", Config.zmq_endpoint),
+        ws_port=int(os.getenv("EDPM_PORT", str(Config.ws_port))),
+        db_path=os.getenv("EDPM_DB", Config.db_path),
+        max_buffer=int(os.getenv("EDPM_MAX_BUFFER", str(Config.max_buffer))),
+        debug=os.getenv("EDPM_DEBUG", "false").lower() == "true",
+        wire_format=os.getenv("EDPM_WIRE_FORMAT", Config.wire_format),
+        
+        gpio_mode=os.getenv("GPIO_MODE", Config.gpio_mode),
+        
+        simulate_sensors=os.getenv("SIMULATE_SENSORS", "true").lower() == "true",
+        i2c_simulator=os.getenv("I2C_SIMULATOR", "true").lower() == "true", 
+        i2s_simulator=os.getenv("I2S_SIMULATOR", "true").lower() == "true",
+        rs485_simulator=os.getenv("RS485_SIMULATOR", "true").lower() == "true",
+        
+        web_enabled=os.getenv("WEB_ENABLED", "true").lower() == "true",
+        static_path=os.getenv("STATIC_PATH", Config.static_path),
+        dashboard_path=os.getenv("DASHBOARD_PATH", Config.dashboard_path),
+        
+        log_level=os.getenv("LOG_LEVEL", Config.log_level),
+    ))
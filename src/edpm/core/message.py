@@ -5,10 +5,25 @@ Defines message structure and types for EDPM communication protocol.
 
 import json
 import time
-from dataclasses import dataclass, asdict
+from functools import partial
+from dataclasses import dataclass, asdict, fields
 from typing import Dict, Any, Optional
 from enum import Enum
 
+try:
+    import orjson
+    HAS_ORJSON = True
+    # int keys and NumPy values are common in handler results; stdlib json accepted the former
+    _ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgpack
+    HAS_MSGPACK = True
+except ImportError:
+    HAS_MSGPACK = False
+
 
 class MessageType(Enum):
     """Message types for EDPM protocol"""
@@ -16,8 +31,53 @@ class MessageType(Enum):
     COMMAND = "cmd" 
     EVENT = "evt"
     RESPONSE = "res"
+    BATCH = "batch"
+
+
+# Plain-string type tags used on the hot construction and type-check paths
+_LOG = MessageType.LOG.value
+_COMMAND = MessageType.COMMAND.value
+_EVENT = MessageType.EVENT.value
+_RESPONSE = MessageType.RESPONSE.value
+
+
+def _msgpack_default(obj):
+    """Convert NumPy scalars and arrays, which msgpack can't pack natively"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+# Encoders bound once at import so to_json/to_bytes/to_msgpack skip the per-call branching
+if HAS_ORJSON:
+    _dumps = partial(orjson.dumps, option=_ORJSON_OPTS)
+else:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+if HAS_MSGPACK:
+    _packb = partial(msgpack.packb, use_bin_type=True, default=_msgpack_default)
+
+
+def is_json_payload(buf) -> bool:
+    """Tell JSON from MessagePack by the first byte: a JSON object starts with '{'"""
+    return bytes(buf[:1]) == b"{"
+
+
+def _add_slots(cls):
+    """Rebuild a dataclass with __slots__ (dataclass(slots=True) needs Python 3.10)"""
+    names = tuple(f.name for f in fields(cls))
+    cls_dict = dict(cls.__dict__)
+    for name in names:
+        # Defaults live on in the generated __init__; class attributes would clash with the slots
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
 
 
+@_add_slots
 @dataclass
 class Message:
     """
@@ -35,107 +95,131 @@ class Message:
     
     def __post_init__(self):
         """Initialize default values after object creation"""
-        if self.timestamp is None:
-            self.timestamp = time.time()
+        # timestamp stays None until first read via timestamp_or_now
         if self.data is None:
             self.data = {}
     
-    def to_json(self) -> str:
-        """Convert message to JSON string"""
+    @property
+    def timestamp_or_now(self) -> float:
+        """Timestamp, filled in from the clock on first use"""
+        if self.timestamp is None:
+            self.timestamp = time.time()
+        return self.timestamp
+    
+    def _wire_dict(self) -> Dict[str, Any]:
+        """Build the wire representation"""
         # Use short field names for efficient transmission
+        msg_id = self.id
+        source = self.source
+        if msg_id and source:
+            # Common case (client requests and server replies): one literal, no mutation
+            return {
+                "v": self.version,
+                "t": self.type,
+                "ts": self.timestamp_or_now,
+                "d": self.data,
+                "id": msg_id,
+                "src": source,
+            }
+        
         msg_dict = {
             "v": self.version,
             "t": self.type,
-            "ts": self.timestamp,
+            "ts": self.timestamp_or_now,
             "d": self.data
         }
-        
-        if self.id:
-            msg_dict["id"] = self.id
-        if self.source:
-            msg_dict["src"] = self.source
-            
-        return json.dumps(msg_dict)
+        if msg_id:
+            msg_dict["id"] = msg_id
+        if source:
+            msg_dict["src"] = source
+        return msg_dict
+    
+    def to_json(self) -> str:
+        """Convert message to JSON string"""
+        if HAS_ORJSON:
+            return _dumps(self._wire_dict()).decode()
+        return json.dumps(self._wire_dict())
+    
+    def to_bytes(self) -> bytes:
+        """Encode message as UTF-8 JSON bytes for the wire"""
+        return _dumps(self._wire_dict())
+    
+    def to_msgpack(self) -> bytes:
+        """Encode message as MessagePack bytes"""
+        return _packb(self._wire_dict())
+    
+    @classmethod
+    def from_msgpack(cls, buf: bytes) -> 'Message':
+        """Create message from MessagePack bytes or buffer"""
+        try:
+            return cls._from_wire(msgpack.unpackb(buf, raw=False, strict_map_key=False))
+        except (ValueError, msgpack.UnpackException, AttributeError) as e:
+            raise ValueError(f"Invalid message format: {e}")
+    
+    @classmethod
+    def _from_wire(cls, data: Dict[str, Any]) -> 'Message':
+        """Create message from a decoded wire dict"""
+        return cls(
+            version=data.get("v", 1),
+            type=data.get("t", MessageType.LOG.value),
+            id=data.get("id"),
+            source=data.get("src"),
+            timestamp=data.get("ts"),
+            data=data.get("d", {})
+        )
+    
+    @classmethod
+    def from_bytes(cls, buf: bytes) -> 'Message':
+        """Create message from UTF-8 JSON bytes or a buffer such as a ZMQ frame"""
+        if not HAS_ORJSON:
+            # json.loads takes bytes but not memoryview
+            return cls.from_json(bytes(buf))
+        return cls.from_json(buf)
     
     @classmethod
     def from_json(cls, json_str: str) -> 'Message':
         """Create message from JSON string"""
         try:
-            data = json.loads(json_str)
-            return cls(
-                version=data.get("v", 1),
-                type=data.get("t", MessageType.LOG.value),
-                id=data.get("id"),
-                source=data.get("src"),
-                timestamp=data.get("ts", time.time()),
-                data=data.get("d", {})
-            )
+            data = orjson.loads(json_str) if HAS_ORJSON else json.loads(json_str)
+            return cls._from_wire(data)
         except (json.JSONDecodeError, KeyError) as e:
             raise ValueError(f"Invalid message format: {e}")
     
     @classmethod
     def create_log(cls, level: str, message: str, source: str = None, **metadata) -> 'Message':
         """Create a log message"""
-        data = {"level": level, "msg": message}
-        data.update(metadata)
-        
-        return cls(
-            type=MessageType.LOG.value,
-            source=source,
-            data=data
-        )
+        return cls(1, _LOG, None, source, None, {"level": level, "msg": message, **metadata})
     
     @classmethod  
     def create_command(cls, action: str, source: str = None, **params) -> 'Message':
         """Create a command message"""
-        data = {"action": action}
-        data.update(params)
-        
-        return cls(
-            type=MessageType.COMMAND.value,
-            source=source,
-            data=data
-        )
+        return cls(1, _COMMAND, None, source, None, {"action": action, **params})
     
     @classmethod
     def create_event(cls, event: str, source: str = None, **data) -> 'Message':
         """Create an event message"""
-        event_data = {"event": event}
-        event_data.update(data)
-        
-        return cls(
-            type=MessageType.EVENT.value,
-            source=source, 
-            data=event_data
-        )
+        return cls(1, _EVENT, None, source, None, {"event": event, **data})
     
     @classmethod
     def create_response(cls, status: str, source: str = None, **data) -> 'Message':
         """Create a response message"""
-        response_data = {"status": status}
-        response_data.update(data)
-        
-        return cls(
-            type=MessageType.RESPONSE.value,
-            source=source,
-            data=response_data
-        )
+        return cls(1, _RESPONSE, None, source, None, {"status": status, **data})
     
     def is_log(self) -> bool:
         """Check if message is a log message"""
-        return self.type == MessageType.LOG.value
+        return self.type == _LOG
     
     def is_command(self) -> bool:
         """Check if message is a command message"""
-        return self.type == MessageType.COMMAND.value
+        return self.type == _COMMAND
         
     def is_event(self) -> bool:
         """Check if message is an event message"""
-        return self.type == MessageType.EVENT.value
+        return self.type == _EVENT
         
     def is_response(self) -> bool:
         """Check if message is a response message"""
-        return self.type == MessageType.RESPONSE.value
+        return self.type == _RESPONSE
     
     def get_action(self) -> Optional[str]:
         """Get command action if this is a command message"""
@@ -9,8 +9,9 @@ import time
 import sqlite3
 import os
 import logging
+from array import array
 from typing import Dict, Any, Optional, Set
-from .message import Message, MessageType
+from .message import Message, MessageType, HAS_MSGPACK, is_json_payload
 from .config import Config
 
 # Optional dependencies
@@ -31,12 +32,47 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Stored rows are buffered and written in one transaction by the writer task every
+# DB_FLUSH_INTERVAL seconds, or inline once DB_FLUSH_SIZE rows are pending
+DB_FLUSH_SIZE = 500
+DB_FLUSH_INTERVAL = 0.05
+
+# Client log level names -> logging levels
+_LOG_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "warn": logging.WARNING,
+    "error": logging.ERROR,
+    "exception": logging.ERROR,
+    "critical": logging.CRITICAL,
+    "fatal": logging.CRITICAL,
+}
+
+# Commands with no audit value, answered without being written to the database
+UNSTORED_ACTIONS = frozenset({"ping", "get_stats"})
+_COMMAND = MessageType.COMMAND.value
+_RESPONSE = MessageType.RESPONSE.value
+_BATCH = MessageType.BATCH.value
+
+# ZMQ requests are queued by the receive loop and handled by ZMQ_WORKERS concurrent tasks;
+# a full queue stops the receive loop, pushing back on clients through ZMQ's own HWM
+ZMQ_QUEUE_SIZE = 1024
+ZMQ_WORKERS = max(4, os.cpu_count() or 1)
+ZMQ_HWM = 10000
+
+# Larger requests are rejected before they are decoded into Python objects
+MAX_MESSAGE_SIZE = 4 * 1024 * 1024
+
+INSERT_MESSAGE_SQL = 'INSERT INTO messages (timestamp, type, source, data) VALUES (?, ?, ?, ?)'
+INSERT_EVENT_SQL = 'INSERT INTO events (timestamp, event_type, source, data) VALUES (?, ?, ?, ?)'
+
 
 class EDPMServer:
     """
     EDPM Lite Server
     
-    Main server component that handles ZeroMQ REP socket for client communication
+    Main server component that handles ZeroMQ ROUTER socket for client communication
     and manages protocol handlers for GPIO, I2C, I2S, and RS485/Modbus.
     """
     
@@ -46,10 +82,41 @@ class EDPMServer:
         self.running = True
         self.clients = set()
         self.protocol_handlers = {}
-        self.stats = {
-            'messages_processed': 0,
-            'errors': 0,
-            'start_time': time.time()
+        
+        # Stats counters; uptime is measured on the monotonic clock
+        self._msg_count = 0
+        self._err_count = 0
+        self._start_ns = time.perf_counter_ns()
+        
+        # Rows waiting for the next batched write
+        self._pending_messages = []
+        self._pending_events = []
+        
+        # Message routing by type tag
+        self._type_routes = {
+            MessageType.LOG.value: self._handle_log_message,
+            MessageType.COMMAND.value: self._handle_command_message,
+            MessageType.EVENT.value: self._handle_event_message,
+            _BATCH: self._handle_batch_message,
+        }
+        
+        # One transaction at a time per bus; created on first use so they bind to the running loop
+        self._proto_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Command routing: "<prefix>_..." actions by prefix, plus a few exact names
+        self._cmd_routes = {
+            'gpio': 'gpio',
+            'i2c': 'i2c',
+            'i2s': 'i2s',
+            'modbus': 'rs485',
+            'rs485': 'rs485',
+        }
+        self._cmd_exact_routes = {
+            'play_tone': 'i2s',
+            'record_audio': 'i2s',
+            'start_vfd': 'rs485',
+            'stop_vfd': 'rs485',
+            'set_vfd_speed': 'rs485',
         }
         
         # Initialize components
@@ -65,6 +132,10 @@ class EDPMServer:
             os.makedirs(os.path.dirname(self.config.db_path), exist_ok=True)
             
             self.db = sqlite3.connect(self.config.db_path, check_same_thread=False)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute('PRAGMA synchronous=NORMAL')
+            self.db.execute('PRAGMA temp_store=MEMORY')
+            self.db.execute('PRAGMA mmap_size=268435456')
             self.db.execute('''
                 CREATE TABLE IF NOT EXISTS messages (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -84,6 +155,8 @@ class EDPMServer:
                     data TEXT
                 )
             ''')
+            self.db.execute('CREATE INDEX IF NOT EXISTS idx_messages_ts ON messages(timestamp)')
+            self.db.execute('CREATE INDEX IF NOT EXISTS idx_events_ts ON events(timestamp)')
             self.db.commit()
             logger.info(f"Database initialized: {self.config.db_path}")
             
@@ -100,8 +173,12 @@ class EDPMServer:
             return
         
         try:
-            self.zmq_context = zmq.asyncio.Context()
-            self.zmq_socket = self.zmq_context.socket(zmq.REP)
+            # Process-wide context, shared with any client in the same process
+            self.zmq_context = zmq.asyncio.Context.instance()
+            self.zmq_socket = self.zmq_context.socket(zmq.ROUTER)
+            self.zmq_socket.setsockopt(zmq.LINGER, 0)
+            self.zmq_socket.setsockopt(zmq.SNDHWM, ZMQ_HWM)
+            self.zmq_socket.setsockopt(zmq.RCVHWM, ZMQ_HWM)
             self.zmq_socket.bind(self.config.zmq_endpoint)
             logger.info(f"ZeroMQ server bound to {self.config.zmq_endpoint}")
             
@@ -134,6 +211,7 @@ class EDPMServer:
         # Start periodic tasks
         tasks.append(asyncio.create_task(self._stats_update_loop()))
         tasks.append(asyncio.create_task(self._cleanup_loop()))
+        tasks.append(asyncio.create_task(self._db_writer_loop()))
         
         try:
             await asyncio.gather(*tasks)
@@ -148,13 +226,13 @@ class EDPMServer:
         self.running = False
         
         # Close ZeroMQ resources
+        # The shared context is left running for other sockets in the process
         if self.zmq_socket:
-            self.zmq_socket.close()
-        if self.zmq_context:
-            self.zmq_context.term()
+            self.zmq_socket.close(linger=0)
         
         # Close database
         if hasattr(self, 'db'):
+            self._flush_db()
             self.db.close()
         
         # Cleanup protocol handlers
@@ -168,83 +246,135 @@ class EDPMServer:
         logger.info("EDPM Server stopped")
     
     async def _zmq_server_loop(self):
-        """Main ZeroMQ server loop"""
+        """Main ZeroMQ server loop: receive requests and hand them to the worker pool"""
         logger.info("ZeroMQ server loop started")
         
-        while self.running:
-            try:
-                # Receive message with timeout
+        # Created here so the queue binds to the running loop
+        queue = asyncio.Queue(maxsize=ZMQ_QUEUE_SIZE)
+        workers = [asyncio.create_task(self._zmq_worker(queue)) for _ in range(ZMQ_WORKERS)]
+        
+        try:
+            while self.running:
                 try:
-                    message_str = await asyncio.wait_for(
-                        self.zmq_socket.recv_string(), timeout=1.0
-                    )
-                except asyncio.TimeoutError:
-                    continue
-                
-                # Process message
-                response = await self._process_message_string(message_str)
+                    # Receive message with timeout; the body frame is parsed in place by a worker
+                    try:
+                        frames = await asyncio.wait_for(
+                            self.zmq_socket.recv_multipart(copy=False), timeout=1.0
+                        )
+                    except asyncio.TimeoutError:
+                        continue
+                    
+                    # Routing envelope (identity [+ empty delimiter]) followed by the body
+                    envelope, body = frames[:-1], frames[-1]
+                    if len(body.buffer) > MAX_MESSAGE_SIZE:
+                        # Rejected here, unparsed, so the reply goes out before anything queued after it
+                        await self.zmq_socket.send_multipart(envelope + [self._oversize_reply(body.buffer)])
+                        continue
+                    await queue.put((envelope, body))
+                    
+                except Exception as e:
+                    logger.error(f"ZeroMQ server error: {e}")
+        finally:
+            for worker in workers:
+                worker.cancel()
+    
+    async def _zmq_worker(self, queue: asyncio.Queue):
+        """Process queued ZeroMQ requests and send each reply back along its envelope"""
+        while True:
+            envelope, body = await queue.get()
+            try:
+                # Process message; errors come back as replies carrying the request id
+                reply = await self._process_message_buffer(body.buffer)
                 
                 # Send response
-                await self.zmq_socket.send_string(response.to_json())
+                await self.zmq_socket.send_multipart(envelope + [reply], copy=False)
                 
             except Exception as e:
+                # Only the send itself can fail here; another reply would go the same way
                 logger.error(f"ZeroMQ server error: {e}")
-                # Send error response
-                error_response = Message.create_response(
-                    "error", 
-                    source="server",
-                    error=str(e)
-                )
-                try:
-                    await self.zmq_socket.send_string(error_response.to_json())
-                except:
-                    pass
+            finally:
+                queue.task_done()
     
-    async def _process_message_string(self, message_str: str) -> Message:
-        """Process incoming message string"""
+    async def _process_message_buffer(self, buf) -> bytes:
+        """Process incoming message bytes and return the reply encoded the same way"""
+        packed = HAS_MSGPACK and not is_json_payload(buf)
+        message = None
         try:
-            message = Message.from_json(message_str)
-            return await self.process_message(message)
+            if packed:
+                message = Message.from_msgpack(buf)
+                response = await self.process_message(message)
+            else:
+                # Decoded once; the same text is parsed and stored without re-serializing
+                raw = str(buf, 'utf-8')
+                message = Message.from_json(raw)
+                response = await self.process_message(message, raw)
+            # Echo the request id so pipelining clients can correlate replies
+            response.id = message.id
+            return response.to_msgpack() if packed else response.to_bytes()
         except Exception as e:
             logger.error(f"Message processing error: {e}")
-            return Message.create_response(
+            response = Message.create_response(
                 "error",
                 source="server", 
                 error=f"Message processing failed: {e}"
             )
+            # Without an id (undecodable request) the client cannot correlate this reply
+            if message is not None:
+                response.id = message.id
+            return response.to_msgpack() if packed else response.to_bytes()
     
-    async def process_message(self, message: Message) -> Message:
+    def _oversize_reply(self, buf) -> bytes:
+        """
+        Error reply for a request over MAX_MESSAGE_SIZE
+        
+        The body is never parsed, so the reply has no id and cannot be correlated with
+        its request; the client can only tell that one of its pending requests was refused.
+        """
+        size = len(buf)
+        self._err_count += 1
+        logger.warning(f"Rejected {size} byte message (limit {MAX_MESSAGE_SIZE})")
+        response = Message.create_response(
+            "error",
+            source="server",
+            error=f"Message too large: {size} bytes (limit {MAX_MESSAGE_SIZE})"
+        )
+        packed = HAS_MSGPACK and not is_json_payload(buf)
+        return response.to_msgpack() if packed else response.to_bytes()
+    
+    async def process_message(self, message: Message, raw: Optional[str] = None) -> Message:
         """
         Process incoming message and return response
         
         Args:
             message: Incoming message to process
+            raw: JSON text the message was parsed from, stored as-is if given
             
         Returns:
             Response message
         """
-        self.stats['messages_processed'] += 1
+        self._msg_count += 1
         
         try:
-            # Store message in database
-            self._store_message(message)
+            # Store message in database, except responses, batches (each entry is stored
+            # on its own) and health-check commands
+            msg_type = message.type
+            if msg_type != _RESPONSE and msg_type != _BATCH and not (
+                msg_type == _COMMAND and message.data.get('action') in UNSTORED_ACTIONS
+            ):
+                self._store_message(message, raw)
             
             # Route message based on type
-            if message.is_log():
-                return await self._handle_log_message(message)
-            elif message.is_command():
-                return await self._handle_command_message(message)
-            elif message.is_event():
-                return await self._handle_event_message(message)
-            else:
+            route = self._type_routes.get(message.type)
+            if route is None:
                 return Message.create_response(
                     "error",
                     source="server",
                     error=f"Unknown message type: {message.type}"
                 )
+            return await route(message)
                 
         except Exception as e:
-            self.stats['errors'] += 1
+            self._err_count += 1
             logger.error(f"Error processing message: {e}")
             return Message.create_response(
                 "error",
@@ -255,10 +385,11 @@ class EDPMServer:
     async def _handle_log_message(self, message: Message) -> Message:
         """Handle log message"""
         level = message.data.get('level', 'info')
-        msg = message.data.get('msg', '')
+        levelno = _LOG_LEVELS.get(level) or _LOG_LEVELS.get(str(level).lower(), logging.INFO)
         
-        # Log to Python logger
-        getattr(logger, level.lower(), logger.info)(f"[{message.source}] {msg}")
+        # Log to Python logger; formatting is skipped when the level is filtered out
+        if logger.isEnabledFor(levelno):
+            logger.log(levelno, "[%s] %s", message.source, message.data.get('msg', ''))
         
         return Message.create_response("ok", source="server")
     
@@ -274,16 +405,13 @@ class EDPMServer:
         
         # Route to appropriate protocol handler
         try:
-            if action.startswith('gpio_'):
-                return await self._handle_gpio_command(action, message.data)
-            elif action.startswith('i2c_'):
-                return await self._handle_i2c_command(action, message.data)
-            elif action.startswith('i2s_') or action in ['play_tone', 'record_audio']:
-                return await self._handle_i2s_command(action, message.data)
-            elif action.startswith('modbus_') or action.startswith('rs485_'):
-                return await self._handle_rs485_command(action, message.data)
-            else:
-                return await self._handle_generic_command(action, message.data)
+            prefix, sep, _ = action.partition('_')
+            proto = self._cmd_routes.get(prefix) if sep else None
+            if proto is None:
+                proto = self._cmd_exact_routes.get(action)
+                if proto is None:
+                    return await self._handle_generic_command(action, message.data)
+            return await self._dispatch_protocol(proto, action, message.data)
                 
         except Exception as e:
             return Message.create_response(
@@ -304,84 +432,43 @@ class EDPMServer:
         
         return Message.create_response("ok", source="server")
     
-    async def _handle_gpio_command(self, action: str, data: Dict[str, Any]) -> Message:
-        """Handle GPIO command"""
-        handler = self.protocol_handlers.get('gpio')
-        if not handler:
-            return Message.create_response(
-                "error",
-                source="server", 
-                error="GPIO handler not available"
-            )
+    async def _handle_batch_message(self, message: Message) -> Message:
+        """Handle several messages sent in one request (e.g. log + event)"""
+        count = 0
+        for entry in message.data.get('msgs', []):
+            sub = Message._from_wire(entry)
+            if sub.type == _BATCH:
+                continue
+            await self.process_message(sub)
+            count += 1
         
-        try:
-            result = await handler.handle_command(action, data)
-            return Message.create_response("ok", source="server", result=result)
-        except Exception as e:
-            return Message.create_response(
-                "error",
-                source="server",
-                error=f"GPIO command failed: {e}"
-            )
+        return Message.create_response("ok", source="server", count=count)
     
-    async def _handle_i2c_command(self, action: str, data: Dict[str, Any]) -> Message:
-        """Handle I2C command"""
-        handler = self.protocol_handlers.get('i2c')
+    async def _dispatch_protocol(self, proto: str, action: str, data: Dict[str, Any]) -> Message:
+        """Handle command for the given protocol handler"""
+        handler = self.protocol_handlers.get(proto)
         if not handler:
             return Message.create_response(
                 "error",
                 source="server",
-                error="I2C handler not available"
+                error=f"{proto.upper()} handler not available"
             )
         
-        try:
-            result = await handler.handle_command(action, data)
-            return Message.create_response("ok", source="server", result=result)
-        except Exception as e:
-            return Message.create_response(
-                "error",
-                source="server", 
-                error=f"I2C command failed: {e}"
-            )
-    
-    async def _handle_i2s_command(self, action: str, data: Dict[str, Any]) -> Message:
-        """Handle I2S command"""
-        handler = self.protocol_handlers.get('i2s')
-        if not handler:
-            return Message.create_response(
-                "error",
-                source="server",
-                error="I2S handler not available"
-            )
+        # The worker pool overlaps decoding and storage, but commands on one bus must not
+        # interleave (e.g. an ADC config write and its readback)
+        lock = self._proto_locks.get(proto)
+        if lock is None:
+            lock = self._proto_locks[proto] = asyncio.Lock()
         
         try:
-            result = await handler.handle_command(action, data)
+            async with lock:
+                result = await handler.handle_command(action, data)
             return Message.create_response("ok", source="server", result=result)
         except Exception as e:
             return Message.create_response(
                 "error",
                 source="server",
-                error=f"I2S command failed: {e}"
-            )
-    
-    async def _handle_rs485_command(self, action: str, data: Dict[str, Any]) -> Message:
-        """Handle RS485 command"""
-        handler = self.protocol_handlers.get('rs485')
-        if not handler:
-            return Message.create_response(
-                "error",
-                source="server",
-                error="RS485 handler not available"
-            )
-        
-        try:
-            result = await handler.handle_command(action, data)
-            return Message.create_response("ok", source="server", result=result)
-        except Exception as e:
-            return Message.create_response(
-                "error",
-                source="server", 
-                error=f"RS485 command failed: {e}"
+                error=f"{proto.upper()} command failed: {e}"
             )
     
     async def _handle_generic_command(self, action: str, data: Dict[str, Any]) -> Message:
@@ -397,28 +484,43 @@ class EDPMServer:
                 error=f"Unknown command: {action}"
             )
     
-    def _store_message(self, message: Message):
+    def _store_message(self, message: Message, raw: Optional[str] = None):
         """Store message in database"""
-        try:
-            self.db.execute(
-                'INSERT INTO messages (timestamp, type, source, data) VALUES (?, ?, ?, ?)',
-                (message.timestamp, message.type, message.source, message.to_json())
-            )
-            self.db.commit()
-        except Exception as e:
-            logger.error(f"Failed to store message: {e}")
+        self._pending_messages.append(
+            (message.timestamp_or_now, message.type, message.source, raw if raw is not None else message.to_json())
+        )
+        if len(self._pending_messages) >= DB_FLUSH_SIZE:
+            self._flush_db()
     
     def _store_event(self, message: Message):
         """Store event in database"""
+        event_type = message.data.get('event', 'unknown')
+        self._pending_events.append(
+            (message.timestamp_or_now, event_type, message.source, message.to_json())
+        )
+        if len(self._pending_events) >= DB_FLUSH_SIZE:
+            self._flush_db()
+    
+    def _flush_db(self):
+        """Write pending messages and events in a single transaction"""
+        messages, self._pending_messages = self._pending_messages, []
+        events, self._pending_events = self._pending_events, []
+        if not messages and not events:
+            return
         try:
-            event_type = message.data.get('event', 'unknown')
-            self.db.execute(
-                'INSERT INTO events (timestamp, event_type, source, data) VALUES (?, ?, ?, ?)',
-                (message.timestamp, event_type, message.source, message.to_json())
-            )
-            self.db.commit()
+            with self.db:
+                if messages:
+                    self.db.executemany(INSERT_MESSAGE_SQL, messages)
+                if events:
+                    self.db.executemany(INSERT_EVENT_SQL, events)
         except Exception as e:
-            logger.error(f"Failed to store event: {e}")
+            logger.error(f"Failed to store {len(messages)} messages and {len(events)} events: {e}")
+    
+    async def _db_writer_loop(self):
+        """Periodically write buffered rows to the database"""
+        while self.running:
+            await asyncio.sleep(DB_FLUSH_INTERVAL)
+            self._flush_db()
     
     async def _broadcast_event(self, message: Message):
         """Broadcast event to connected clients"""
@@ -427,10 +529,10 @@ class EDPMServer:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get server statistics"""
-        uptime = time.time() - self.stats['start_time']
+        uptime = (time.perf_counter_ns() - self._start_ns) / 1e9
         return {
-            'messages_processed': self.stats['messages_processed'],
-            'errors': self.stats['errors'],
+            'messages_processed': self._msg_count,
+            'errors': self._err_count,
             'uptime': uptime,
             'clients_connected': len(self.clients),
             'protocol_handlers': list(self.protocol_handlers.keys()),
@@ -464,17 +566,22 @@ class EDPMServer:
     async def _cleanup_old_messages(self):
         """Cleanup old messages from database"""
         try:
+            self._flush_db()
+            
             # Keep only last 10000 messages
             cutoff_time = time.time() - (24 * 60 * 60)  # 24 hours ago
             
-            self.db.execute(
-                'DELETE FROM messages WHERE timestamp < ? AND id NOT IN (SELECT id FROM messages ORDER BY timestamp DESC LIMIT ?)',
-                (cutoff_time, self.config.max_buffer)
-            )
-            self.db.execute(
-                'DELETE FROM events WHERE timestamp < ? AND id NOT IN (SELECT id FROM events ORDER BY timestamp DESC LIMIT ?)',
-                (cutoff_time, self.config.max_buffer)
-            )
+            for table in ('messages', 'events'):
+                # Newest row past the retained window; everything at or below it is a candidate
+                row = self.db.execute(
+                    f'SELECT id FROM {table} ORDER BY id DESC LIMIT 1 OFFSET ?',
+                    (self.config.max_buffer,)
+                ).fetchone()
+                if row is not None:
+                    self.db.execute(
+                        f'DELETE FROM {table} WHERE id <= ? AND timestamp < ?',
+                        (row[0], cutoff_time)
+                    )
             self.db.commit()
             
         except Exception as e:
@@ -485,45 +592,59 @@ class EDPMServer:
 class SimpleGPIOSimulator:
     """Simple GPIO simulator for development and testing"""
     
+    # Pin numbers 0..NUM_PINS-1; state is kept in flat per-pin arrays
+    NUM_PINS = 64
+    _DIRECTIONS = {'IN': 1, 'OUT': 2}
+    
     def __init__(self):
-        self.pins = {}
+        n = self.NUM_PINS
+        self._direction = bytearray(n)  # 0 = not set up, else _DIRECTIONS value
+        self._value = bytearray(n)
+        self._pwm_freq = array('f', bytes(4 * n))
+        self._pwm_duty = array('f', bytes(4 * n))
+        self._pwm_state = bytearray(n)  # 0 = never started, 1 = stopped, 2 = active
         self.mode = "BCM"
         logger.info("GPIO Simulator initialized")
     
     def setup(self, pin: int, direction: str):
-        self.pins[pin] = {
-            'direction': direction,
-            'value': 0,
-            'pwm': None
-        }
+        if not 0 <= pin < self.NUM_PINS:
+            return False
+        self._direction[pin] = self._DIRECTIONS.get(direction.upper(), 1)
+        self._value[pin] = 0
+        self._pwm_state[pin] = 0
         return True
     
     def output(self, pin: int, value: int):
-        if pin in self.pins:
-            self.pins[pin]['value'] = value
+        if 0 <= pin < self.NUM_PINS and self._direction[pin]:
+            self._value[pin] = 1 if value else 0
             return True
         return False
     
     def input(self, pin: int) -> int:
-        if pin in self.pins:
-            return self.pins[pin].get('value', 0)
+        if 0 <= pin < self.NUM_PINS:
+            return self._value[pin]
         return 0
     
     def pwm_start(self, pin: int, frequency: float, duty_cycle: float):
-        if pin not in self.pins:
+        if not 0 <= pin < self.NUM_PINS:
+            return False
+        if not self._direction[pin]:
             self.setup(pin, 'OUT')
-        self.pins[pin]['pwm'] = {
-            'frequency': frequency,
-            'duty_cycle': duty_cycle,
-            'active': True
-        }
+        self._pwm_freq[pin] = frequency
+        self._pwm_duty[pin] = duty_cycle
+        self._pwm_state[pin] = 2
         return True
     
     def pwm_stop(self, pin: int):
-        if pin in self.pins and self.pins[pin].get('pwm'):
-            self.pins[pin]['pwm']['active'] = False
+        if 0 <= pin < self.NUM_PINS and self._pwm_state[pin]:
+            self._pwm_state[pin] = 1
             return True
         return False
     
     def cleanup(self):
-        self.pins.clear()
+        n = self.NUM_PINS
+        self._direction[:] = bytes(n)
+        self._value[:] = bytes(n)
+        self._pwm_freq[:] = array('f', bytes(4 * n))
+        self._pwm_duty[:] = array('f', bytes(4 * n))
+        self._pwm_state[:] = bytes(n)
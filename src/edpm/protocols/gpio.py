@@ -34,6 +34,23 @@ class GPIOHandler:
         self.pins_setup = {}
         self.pwm_instances = {}
         
+        # Command dispatch: action -> call with the command data
+        self._actions = {
+            "gpio_set": lambda d: self._set_pin(d.get("pin"), d.get("value")),
+            "gpio_get": lambda d: self._get_pin(d.get("pin")),
+            "gpio_toggle": lambda d: self._toggle_pin(d.get("pin")),
+            "gpio_setup": lambda d: self._setup_pin(
+                d.get("pin"), d.get("direction", "OUT"), d.get("pull_up_down", "PUD_OFF")
+            ),
+            "gpio_pwm_start": lambda d: self._pwm_start(
+                d.get("pin"), d.get("frequency", 1000), d.get("duty_cycle", 50)
+            ),
+            "gpio_pwm_stop": lambda d: self._pwm_stop(d.get("pin")),
+            "gpio_pwm_change": lambda d: self._pwm_change_duty_cycle(d.get("pin"), d.get("duty_cycle")),
+            "gpio_status": lambda d: self._get_status(),
+            "gpio_cleanup": lambda d: self._cleanup(),
+        }
+        
         # Initialize GPIO based on mode
         if self.config.gpio_mode == "SIMULATOR":
             self._init_simulator()
@@ -78,37 +95,11 @@ class GPIOHandler:
             Result dictionary
         """
         try:
-            if action == "gpio_set":
-                return await self.set_pin(data.get("pin"), data.get("value"))
-            elif action == "gpio_get":
-                return await self.get_pin(data.get("pin"))
-            elif action == "gpio_toggle":
-                return await self.toggle_pin(data.get("pin"))
-            elif action == "gpio_setup":
-                return await self.setup_pin(
-                    data.get("pin"), 
-                    data.get("direction", "OUT"),
-                    data.get("pull_up_down", "PUD_OFF")
-                )
-            elif action == "gpio_pwm_start":
-                return await self.pwm_start(
-                    data.get("pin"),
-                    data.get("frequency", 1000),
-                    data.get("duty_cycle", 50)
-                )
-            elif action == "gpio_pwm_stop":
-                return await self.pwm_stop(data.get("pin"))
-            elif action == "gpio_pwm_change":
-                return await self.pwm_change_duty_cycle(
-                    data.get("pin"),
-                    data.get("duty_cycle")
-                )
-            elif action == "gpio_status":
-                return await self.get_status()
-            elif action == "gpio_cleanup":
-                return await self.cleanup()
-            else:
+            handler = self._actions.get(action)
+            if handler is None:
                 raise ValueError(f"Unknown GPIO action: {action}")
+            # Every GPIO operation is non-blocking, so the sync implementations are called directly
+            return handler(data)
                 
         except Exception as e:
             logger.error(f"GPIO command error: {e}")
@@ -116,6 +107,10 @@ class GPIOHandler:
     
     async def setup_pin(self, pin: int, direction: str = "OUT", pull_up_down: str = "PUD_OFF") -> Dict[str, Any]:
         """Setup GPIO pin"""
+        return self._setup_pin(pin, direction, pull_up_down)
+    
+    def _setup_pin(self, pin: int, direction: str = "OUT", pull_up_down: str = "PUD_OFF") -> Dict[str, Any]:
+        """Setup GPIO pin (synchronous)"""
         if pin is None:
             raise ValueError("Pin number required")
         
@@ -156,6 +151,10 @@ class GPIOHandler:
     
     async def set_pin(self, pin: int, value: Union[int, bool]) -> Dict[str, Any]:
         """Set GPIO pin value"""
+        return self._set_pin(pin, value)
+    
+    def _set_pin(self, pin: int, value: Union[int, bool]) -> Dict[str, Any]:
+        """Set GPIO pin value (synchronous)"""
         if pin is None:
             raise ValueError("Pin number required")
         if value is None:
@@ -163,7 +162,7 @@ class GPIOHandler:
         
         # Ensure pin is setup as output
         if pin not in self.pins_setup:
-            await self.setup_pin(pin, "OUT")
+            self._setup_pin(pin, "OUT")
         
         try:
             int_value = int(bool(value))  # Convert to 0 or 1
@@ -188,6 +187,10 @@ class GPIOHandler:
     
     async def get_pin(self, pin: int) -> Dict[str, Any]:
         """Get GPIO pin value"""
+        return self._get_pin(pin)
+    
+    def _get_pin(self, pin: int) -> Dict[str, Any]:
+        """Get GPIO pin value (synchronous)"""
         if pin is None:
             raise ValueError("Pin number required")
         
@@ -211,16 +214,20 @@ class GPIOHandler:
     
     async def toggle_pin(self, pin: int) -> Dict[str, Any]:
         """Toggle GPIO pin value"""
+        return self._toggle_pin(pin)
+    
+    def _toggle_pin(self, pin: int) -> Dict[str, Any]:
+        """Toggle GPIO pin value (synchronous)"""
         if pin is None:
             raise ValueError("Pin number required")
         
         try:
             # Get current value
-            current = await self.get_pin(pin)
+            current = self._get_pin(pin)
             new_value = 1 - current['value']
             
             # Set new value
-            result = await self.set_pin(pin, new_value)
+            result = self._set_pin(pin, new_value)
             
             return {
                 'pin': pin,
@@ -234,13 +241,17 @@ class GPIOHandler:
     
     async def pwm_start(self, pin: int, frequency: float, duty_cycle: float) -> Dict[str, Any]:
         """Start PWM on GPIO pin"""
+        return self._pwm_start(pin, frequency, duty_cycle)
+    
+    def _pwm_start(self, pin: int, frequency: float, duty_cycle: float) -> Dict[str, Any]:
+        """Start PWM on GPIO pin (synchronous)"""
         if pin is None:
             raise ValueError("Pin number required")
         
         try:
             # Ensure pin is setup as output
             if pin not in self.pins_setup:
-                await self.setup_pin(pin, "OUT")
+                self._setup_pin(pin, "OUT")
             
             if self.simulator:
                 result = self.simulator.pwm_start(pin, frequency, duty_cycle)
@@ -270,6 +281,10 @@ class GPIOHandler:
     
     async def pwm_stop(self, pin: int) -> Dict[str, Any]:
         """Stop PWM on GPIO pin"""
+        return self._pwm_stop(pin)
+    
+    def _pwm_stop(self, pin: int) -> Dict[str, Any]:
+        """Stop PWM on GPIO pin (synchronous)"""
         if pin is None:
             raise ValueError("Pin number required")
         
@@ -294,6 +309,10 @@ class GPIOHandler:
     
     async def pwm_change_duty_cycle(self, pin: int, duty_cycle: float) -> Dict[str, Any]:
         """Change PWM duty cycle"""
+        return self._pwm_change_duty_cycle(pin, duty_cycle)
+    
+    def _pwm_change_duty_cycle(self, pin: int, duty_cycle: float) -> Dict[str, Any]:
+        """Change PWM duty cycle (synchronous)"""
         if pin is None:
             raise ValueError("Pin number required")
         if duty_cycle is None:
@@ -320,6 +339,10 @@ class GPIOHandler:
     
     async def get_status(self) -> Dict[str, Any]:
         """Get GPIO handler status"""
+        return self._get_status()
+    
+    def _get_status(self) -> Dict[str, Any]:
+        """Get GPIO handler status (synchronous)"""
         return {
             'mode': self.mode,
             'pins_setup': self.pins_setup.copy(),
@@ -330,6 +353,10 @@ class GPIOHandler:
     
     async def cleanup(self) -> Dict[str, Any]:
         """Cleanup GPIO resources"""
+        return self._cleanup()
+    
+    def _cleanup(self) -> Dict[str, Any]:
+        """Cleanup GPIO resources (synchronous)"""
         try:
             # Stop all PWM instances
             if not self.simulator:
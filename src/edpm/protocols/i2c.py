@@ -113,7 +113,10 @@ class I2CHandler:
         """
         try:
             if action == "i2c_scan":
-                return await self.scan_bus()
+                return await self.scan_bus(
+                    data.get("start", 0x03),
+                    data.get("end", 0x77)
+                )
             elif action == "i2c_read":
                 return await self.read_device(
                     data.get("address"),
@@ -139,12 +142,13 @@ class I2CHandler:
             logger.error(f"I2C command error: {e}")
             raise
     
-    async def scan_bus(self) -> Dict[str, Any]:
-        """Scan I2C bus for devices"""
+    async def scan_bus(self, start: int = 0x03, end: int = 0x77) -> Dict[str, Any]:
+        """Scan I2C bus for devices in the inclusive address range start..end"""
         devices_found = []
+        start, end = max(start, 0x03), min(end, 0x77)  # Valid I2C address range
         
         try:
-            for address in range(0x03, 0x78):  # Valid I2C address range
+            for address in range(start, end + 1):
                 try:
                     if self.simulator:
                         if self.simulator.device_exists(address):
@@ -167,7 +171,9 @@ class I2CHandler:
                     # Device not present
                     continue
             
-            self.scan_results = devices_found
+            # A range scan (e.g. one chunk of i2c_scan_parallel) only replaces its own range
+            kept = [d for d in self.scan_results if not start <= d['address'] <= end]
+            self.scan_results = sorted(kept + devices_found, key=lambda d: d['address'])
             
             return {
                 'devices_found': len(devices_found),
@@ -155,7 +155,7 @@ class RS485Handler:
                 return await self.stop_vfd(data.get("device_id", 1))
             elif action == "read_power_meter":
                 return await self.read_power_meter(data.get("device_id", 2))
-            elif action == "scan_devices":
+            elif action in ("scan_devices", "rs485_scan"):
                 return await self.scan_devices(
                     data.get("start_id", 1),
                     data.get("end_id", 10)
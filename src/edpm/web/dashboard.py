@@ -16,7 +16,7 @@ from ..core.config import Config
 
 # Optional dependencies
 try:
-    from aiohttp import web, WSMsgType
+    from aiohttp import web, WSMsgType, WSCloseCode
     import aiofiles
     HAS_WEB = True
 except ImportError:
@@ -25,6 +25,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Seconds a broadcast waits on one client before dropping it
+BROADCAST_SEND_TIMEOUT = 0.5
+
 
 class DashboardServer:
     """
@@ -43,6 +46,7 @@ class DashboardServer:
         self.edpm_server = edpm_server
         self.app = web.Application()
         self.websocket_clients: Set[web.WebSocketResponse] = set()
+        self._closing_tasks: Set[asyncio.Task] = set()
         self.running = False
         
         # Setup routes
@@ -155,7 +159,7 @@ class DashboardServer:
             
             # Handle incoming messages
             async for msg in ws:
-                if msg.type == WSMsgType.TEXT:
+                if msg.type in (WSMsgType.TEXT, WSMsgType.BINARY):
                     try:
                         data = json.loads(msg.data)
                         await self._handle_websocket_message(ws, data)
@@ -237,6 +241,39 @@ class DashboardServer:
         except Exception as e:
             logger.error(f"Error sending to WebSocket client: {e}")
     
+    async def _send_payload(self, ws: web.WebSocketResponse, payload: str) -> bool:
+        """Send pre-encoded text to a WebSocket client; a failed or slow client is dropped"""
+        send = asyncio.ensure_future(ws.send_str(payload))
+        # Retrieve the outcome of a send left running past the timeout
+        send.add_done_callback(lambda t: t.cancelled() or t.exception())
+        try:
+            # asyncio.wait, unlike wait_for, never cancels the send halfway through a frame
+            done, _ = await asyncio.wait({send}, timeout=BROADCAST_SEND_TIMEOUT)
+            if send in done:
+                send.result()
+                return True
+            reason = f"send timed out after {BROADCAST_SEND_TIMEOUT}s"
+        except Exception as e:
+            reason = repr(e)
+        
+        logger.warning(f"Dropping WebSocket client: {reason}")
+        self._drop_client(ws)
+        return False
+    
+    def _drop_client(self, ws: web.WebSocketResponse):
+        """Stop broadcasting to a client and close it so the browser reconnects"""
+        self.websocket_clients.discard(ws)
+        task = asyncio.create_task(self._close_client(ws))
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+    
+    async def _close_client(self, ws: web.WebSocketResponse):
+        """Close a dropped client connection"""
+        try:
+            await ws.close(code=WSCloseCode.GOING_AWAY, message=b'Too slow')
+        except Exception as e:
+            logger.debug(f"Error closing dropped WebSocket client: {e}")
+    
     async def _send_error(self, ws: web.WebSocketResponse, error: str):
         """Send error message to WebSocket client"""
         await self._send_to_client(ws, {
@@ -256,18 +293,9 @@ class DashboardServer:
             'timestamp': time.time()
         }
         
-        # Send to all clients
-        disconnected_clients = set()
-        for ws in self.websocket_clients:
-            try:
-                await self._send_to_client(ws, message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                disconnected_clients.add(ws)
-        
-        # Remove disconnected clients
-        for ws in disconnected_clients:
-            self.websocket_clients.discard(ws)
+        # Encode once, then send to all clients concurrently; failed or slow ones are dropped
+        payload = json.dumps(message)
+        await asyncio.gather(*(self._send_payload(ws, payload) for ws in list(self.websocket_clients)))
     
     async def broadcast_system_stats(self):
         """Broadcast system statistics to all clients"""
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test edpm-client commands against a running EDPM server
+"""
+import sys
+import os
+import asyncio
+import logging
+import threading
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from edpm import cli
+from edpm.core.config import Config
+from edpm.core.server import EDPMServer
+from edpm.protocols.gpio import GPIOHandler
+from edpm.protocols.i2c import I2CHandler
+from edpm.protocols.rs485 import RS485Handler
+
+
+@pytest.fixture
+def endpoint(tmp_path, monkeypatch):
+    """Serve GPIO, I2C and RS485 commands on a private IPC endpoint in a background thread"""
+    config = Config(
+        zmq_endpoint=f"ipc://{tmp_path}/edpm.ipc",
+        db_path=str(tmp_path / "server.db"),
+        gpio_mode="SIMULATOR",
+        i2c_simulator=True,
+        rs485_simulator=True,
+    )
+    # The client's offline store also comes from the environment
+    monkeypatch.setenv("EDPM_DB", str(tmp_path / "client.db"))
+
+    server = EDPMServer(config)
+    server.add_protocol_handler("gpio", GPIOHandler(config))
+    server.add_protocol_handler("i2c", I2CHandler(config))
+    server.add_protocol_handler("rs485", RS485Handler(config))
+    stop = threading.Event()
+
+    async def serve():
+        task = asyncio.create_task(server._zmq_server_loop())
+        while not stop.is_set():
+            await asyncio.sleep(0.02)
+        server.running = False
+        await task
+        await server.stop()
+
+    thread = threading.Thread(target=asyncio.run, args=(serve(),))
+    thread.start()
+    yield config.zmq_endpoint
+    stop.set()
+    thread.join()
+
+
+def run_client(monkeypatch, capsys, endpoint, *argv):
+    """Run edpm-client with argv and return what it printed"""
+    monkeypatch.setattr(sys, "argv", ["edpm-client", "--endpoint", endpoint, *argv])
+    # Keep the CLI's queue-based logging off pytest's captured stdout
+    monkeypatch.setattr(cli, "setup_logging", lambda *args: logging.getLogger("edpm-client"))
+    cli.client_main()
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (("status",), "Server Status: "),
+    (("gpio", "write", "17", "1"), "GPIO Pin 17 set to 1: "),
+    (("gpio", "read", "17"), "GPIO Pin 17: "),
+    (("gpio", "pwm", "18", "1000", "50"), "GPIO Pin 18 PWM set: "),
+    (("i2c", "read", "0x76", "0xD0"), "I2C Read from 0x76[0xD0]: "),
+    (("i2c", "write", "0x76", "0xF4", "0x27"), "I2C Write to 0x76[0xF4]: "),
+    (("rs485", "read", "1", "0", "--count", "2"), "RS485 Modbus Read: "),
+    (("rs485", "vfd", "start", "1"), "VFD Start: "),
+    (("rs485", "vfd", "speed", "1", "50"), "VFD Speed Set: "),
+    (("rs485", "vfd", "stop", "1"), "VFD Stop: "),
+])
+def test_client_commands(monkeypatch, capsys, endpoint, argv, expected):
+    """Each client command reaches the server and gets an ok reply"""
+    out = run_client(monkeypatch, capsys, endpoint, *argv)
+    assert out.startswith(expected)
+    assert "'status': 'ok'" in out
+
+
+def test_client_scans(monkeypatch, capsys, endpoint):
+    """Scans go out as one command per bus"""
+    out = run_client(monkeypatch, capsys, endpoint, "i2c", "scan")
+    assert out.startswith("I2C Devices Found: ")
+    assert "'devices_found': 2" in out
+
+    out = run_client(monkeypatch, capsys, endpoint, "rs485", "scan", "--start", "1", "--end", "3")
+    assert out.startswith("RS485 Device Scan: ")
+    assert "'status': 'ok'" in out
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test EDPM client request/reply matching over ZeroMQ
+"""
+import sys
+import os
+import asyncio
+
+import zmq
+import zmq.asyncio
+
+# Add src directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from edpm.core.client import EDPMClient
+from edpm.core.config import Config
+from edpm.core.message import Message
+
+
+def test_client_pipelined_replies(tmp_path):
+    """Pipelined requests each get their own reply; unknown ids are dropped"""
+    endpoint = f"ipc://{tmp_path}/edpm.ipc"
+    config = Config(zmq_endpoint=endpoint, db_path=str(tmp_path / "client.db"))
+    count = 8
+
+    async def serve(router):
+        """Collect every request, then answer out of order after a stray reply"""
+        requests = []
+        while len(requests) < count:
+            frames = await router.recv_multipart()
+            envelope, body = frames[:-1], frames[-1]
+            requests.append((envelope, Message.from_bytes(body)))
+
+        stray = Message.create_response("ok", source="server", n=-1)
+        stray.id = "no-such-request"
+        await router.send_multipart(requests[0][0] + [stray.to_bytes()])
+
+        for envelope, request in reversed(requests):
+            reply = Message.create_response("ok", source="server", n=request.data["n"])
+            reply.id = request.id
+            await router.send_multipart(envelope + [reply.to_bytes()])
+
+    async def run():
+        router = zmq.asyncio.Context.instance().socket(zmq.ROUTER)
+        router.setsockopt(zmq.LINGER, 0)
+        router.bind(endpoint)
+        client = EDPMClient(endpoint, config)
+        try:
+            await client.connect()
+            server = asyncio.create_task(serve(router))
+            replies = await asyncio.gather(*(client.command("echo", n=n) for n in range(count)))
+            await server
+            return replies, dict(client._pending)
+        finally:
+            await client.disconnect()
+            router.close()
+
+    replies, pending = asyncio.run(run())
+    assert [reply.data["n"] for reply in replies] == list(range(count))
+    assert pending == {}
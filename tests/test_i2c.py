@@ -7,8 +7,9 @@ import os
 import asyncio
 import time
 
-# Add parent directory to path
+# Add parent directory to path, and src for the server-side edpm package
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
 
 from protocols.i2c_handler import I2CHandler
 import edpm_lite
@@ -102,6 +103,25 @@ def test_i2c_with_edpm():
     print("✅ I2C-EDPM integration test completed")
     return True
 
+def test_i2c_chunked_scan_status():
+    """Range scans (as sent by i2c_scan_parallel) keep the full result in i2c_status"""
+    from edpm.core.config import Config
+    from edpm.protocols.i2c import I2CHandler as ServerI2CHandler
+    
+    i2c = ServerI2CHandler(Config(i2c_simulator=True))
+    
+    async def scan():
+        await i2c.scan_bus(0x03, 0x77)
+        # Chunks covering the simulated devices, then an empty one finishing last
+        await i2c.scan_bus(0x40, 0x4F)
+        await i2c.scan_bus(0x70, 0x77)
+        await i2c.scan_bus(0x10, 0x1F)
+        return await i2c.get_status()
+    
+    status = asyncio.run(scan())
+    assert [d['address'] for d in status['last_scan']] == [0x48, 0x76]
+    assert status['devices_scanned'] == 2
+
 async def main():
     """Main test runner"""
     print("🚀 EDPM I2C Protocol Tests")
@@ -5,14 +5,29 @@ Test RS485/Modbus protocol functionality
 import sys
 import os
 import asyncio
+import random
 import time
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from protocols import rs485_handler
 from protocols.rs485_handler import RS485Handler, ModbusFunction
 import edpm_lite
 
+
+def _crc16_bitwise(data: bytes) -> int:
+    """Reference Modbus CRC16, one bit at a time"""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+_CRC_DATA = bytes(random.Random(485).getrandbits(8) for _ in range(300))
+
 def test_rs485_basic():
     """Test basic RS485/Modbus functionality"""
     print("⚡ Testing RS485/Modbus Protocol Handler")
@@ -215,6 +230,80 @@ def test_rs485_with_edpm():
     print("✅ RS485-EDPM integration test completed")
     return True
 
+def test_rs485_crc16_matches_bitwise():
+    """Every CRC path (byte table, folded table, JIT) matches the bitwise CRC"""
+    rs485 = RS485Handler(simulator=True)
+    
+    # Around the folded-table (32) and JIT (64) thresholds, plus odd lengths above each
+    for length in (0, 1, 31, 32, 33, 35, 63, 64, 65, 67, 255, 256, 299):
+        data = _CRC_DATA[:length]
+        expected = _crc16_bitwise(data)
+        
+        # Length dispatch, as used by frame building and parsing
+        assert rs485._calculate_crc16(data) == expected, length
+        assert rs485._calculate_crc16(memoryview(data)) == expected, length
+        
+        # Each path directly, below its dispatch threshold too
+        assert rs485_handler._crc16_modbus(data) == expected, length
+        assert rs485_handler._crc16_modbus_wide(data) == expected, length
+        assert rs485_handler._crc16_modbus_wide(memoryview(data)) == expected, length
+        if rs485_handler.HAS_NUMBA:
+            buf = rs485_handler.np.frombuffer(data, dtype=rs485_handler.np.uint8)
+            assert int(rs485_handler._crc16_jit(buf, rs485_handler._CRC16_TABLE_NP)) == expected, length
+
+def _counting_coil_reads(rs485):
+    """Count read_coils calls reaching the device"""
+    calls = []
+    read_coils = rs485.read_coils
+    def counted(*args):
+        calls.append(args)
+        return read_coils(*args)
+    rs485.read_coils = counted
+    return calls
+
+def test_rs485_coil_cache_write_invalidates():
+    """A coil write drops the cached read, so the new state is read back"""
+    rs485 = RS485Handler(simulator=True)
+    calls = _counting_coil_reads(rs485)
+    
+    before = rs485._read_coils_cached(3, 0, 3, (5000, 0))
+    assert rs485._read_coils_cached(3, 0, 3, (5000, 0)) == before
+    assert len(calls) == 1
+    
+    rs485.write_single_coil(3, 0, not before[0])
+    after = rs485._read_coils_cached(3, 0, 3, (5000, 0))
+    assert len(calls) == 2
+    assert after[0] == (not before[0])
+
+def test_rs485_coil_cache_stamp_change():
+    """A changed (setpoint, fault_code) stamp forces a re-read"""
+    rs485 = RS485Handler(simulator=True)
+    calls = _counting_coil_reads(rs485)
+    
+    rs485._read_coils_cached(3, 0, 3, (5000, 0))
+    rs485._read_coils_cached(3, 0, 3, (5000, 0))
+    assert len(calls) == 1
+    
+    # Fault trip, then a setpoint change
+    rs485._read_coils_cached(3, 0, 3, (5000, 7))
+    rs485._read_coils_cached(3, 0, 3, (6000, 7))
+    assert len(calls) == 3
+
+def test_rs485_coil_cache_ttl():
+    """An entry older than COIL_CACHE_TTL is re-read"""
+    rs485 = RS485Handler(simulator=True)
+    calls = _counting_coil_reads(rs485)
+    
+    rs485._read_coils_cached(3, 0, 3, (5000, 0))
+    
+    # Age the entry just past the TTL
+    key = (3, 0, 3)
+    stamp, read_at, coils = rs485._coil_cache[key]
+    rs485._coil_cache[key] = (stamp, read_at - rs485_handler.COIL_CACHE_TTL, coils)
+    
+    rs485._read_coils_cached(3, 0, 3, (5000, 0))
+    assert len(calls) == 2
+
 async def main():
     """Main test runner"""
     print("🚀 EDPM RS485/Modbus Protocol Tests")
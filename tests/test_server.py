@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test EDPM server message routing
+"""
+import sys
+import os
+import asyncio
+import sqlite3
+import importlib.util
+from dataclasses import asdict
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "src"))
+
+from edpm.core.config import Config
+from edpm.core.message import Message
+from edpm.core.server import EDPMServer
+import edpm_lite
+
+
+def _load_lite_server():
+    """Import edpm-lite-server.py, whose file name is not a valid module name"""
+    path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "edpm-lite-server.py")
+    spec = importlib.util.spec_from_file_location("edpm_lite_server", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _batch_wire(source="simulator"):
+    """Log + event batch as sent by edpm_lite.EDPMLite.log_and_emit"""
+    log_msg = edpm_lite.Message(t="log", src=source, d={"level": "info", "msg": "tick", "value": 1})
+    evt_msg = edpm_lite.Message(t="evt", src=source, d={"event": "tick", "value": 1})
+    return {"msgs": [asdict(log_msg), asdict(evt_msg)]}
+
+
+def test_core_server_batch(tmp_path):
+    """A batch is routed by the core server and each entry stored on its own"""
+    config = Config(
+        zmq_endpoint=f"ipc://{tmp_path}/edpm.ipc",
+        db_path=str(tmp_path / "edpm.db"),
+    )
+    server = EDPMServer(config)
+
+    async def run():
+        batch = edpm_lite.Message(t="batch", src="simulator", d=_batch_wire())
+        response = await server.process_message(Message.from_json(batch.to_json()))
+        await server.stop()
+        return response
+
+    response = asyncio.run(run())
+    assert response.data["status"] == "ok"
+    assert response.data["count"] == 2
+
+    db = sqlite3.connect(config.db_path)
+    types = sorted(row[0] for row in db.execute("SELECT type FROM messages"))
+    events = [row[0] for row in db.execute("SELECT event_type FROM events")]
+    db.close()
+    # The batch envelope itself is not stored
+    assert types == ["evt", "log"]
+    assert events == ["tick"]
+
+
+def test_lite_server_handle_batch(tmp_path):
+    """handle_batch processes each entry and skips nested batches"""
+    lite = _load_lite_server()
+    lite.CONFIG["db_path"] = str(tmp_path / "edpm-lite.db")
+    server = lite.EDPMLiteServer()
+
+    wire = _batch_wire()
+    wire["msgs"].append(asdict(edpm_lite.Message(t="batch", d=_batch_wire())))
+
+    response = asyncio.run(server.handle_batch(lite.Message(t="batch", d=wire)))
+    assert response.d["status"] == "ok"
+    assert response.d["count"] == 2
+
+    server.flush_db()
+    assert server.db.execute("SELECT message FROM logs").fetchall() == [("tick",)]
+    assert server.db.execute("SELECT event FROM events").fetchall() == [("tick",)]
+    server.db.close()
+
+
+def test_lite_server_flush_counts_duplicate_ids(tmp_path):
+    """Rows skipped for a duplicate id are logged as errors instead of vanishing"""
+    lite = _load_lite_server()
+    lite.CONFIG["db_path"] = str(tmp_path / "edpm-lite.db")
+    server = lite.EDPMLiteServer()
+
+    async def send():
+        # Two clients writing in the same microsecond get the same id
+        for src in ("client-a", "client-b"):
+            await server.handle_log(lite.Message(t="log", id="1.000000", src=src, d={"msg": src}))
+        await server.handle_event(lite.Message(t="evt", id="2.000000", d={"event": "tick"}))
+
+    asyncio.run(send())
+    server.flush_db()
+    assert server.db.execute("SELECT COUNT(*) FROM logs").fetchone() == (1,)
+    assert server.db.execute("SELECT COUNT(*) FROM events").fetchone() == (1,)
+    assert server.stats['errors'] == 1
+    server.db.close()